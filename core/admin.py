@@ -4,6 +4,36 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 
+class NumericRangeFilter(admin.FieldListFilter):
+    """
+    Filter of a numeric field by a minimum and a maximum (__gte and __lte lookups),
+    so the database index of the field can be used.
+    """
+    template = 'admin/range_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg_gte = '{0}__gte'.format(field_path)
+        self.lookup_kwarg_lte = '{0}__lte'.format(field_path)
+        super(NumericRangeFilter, self).__init__(field, request, params, model, model_admin, field_path)
+        # Empty inputs do not limit the range.
+        self.used_parameters = {parameter: value for parameter, value in self.used_parameters.items() if value}
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg_gte, self.lookup_kwarg_lte]
+
+    def choices(self, changelist):
+        yield {
+            'gte_name': self.lookup_kwarg_gte,
+            'gte_value': self.used_parameters.get(self.lookup_kwarg_gte, ''),
+            'lte_name': self.lookup_kwarg_lte,
+            'lte_value': self.used_parameters.get(self.lookup_kwarg_lte, ''),
+            # The other filters are kept, when the range is submitted.
+            'hidden_parameters': [(parameter, value) for parameter, value in changelist.get_filters_params().items()
+                                  if parameter not in self.expected_parameters()],
+            'reset_query_string': changelist.get_query_string(remove=self.expected_parameters()),
+        }
+
+
 class ResourceSkillInline(admin.TabularInline):
     view_on_site = False
     model = models.ResourceSkill
@@ -366,6 +396,10 @@ class AbilityAdmin(admin.ModelAdmin):
     view_on_site = False
     model = models.Ability
     list_display = [field.name for field in model._meta.fields]
+    # Remove the typed values, which are only used for filtering.
+    list_display.remove('numeric_value')
+    list_display.remove('boolean_value')
+    list_display.remove('text_value')
     # Remove the old element and replace it with a link.
     list_display.remove('resource_skill')
     list_display.insert(1, 'resource_skill_link')
@@ -374,6 +408,7 @@ class AbilityAdmin(admin.ModelAdmin):
 
     readonly_fields = ['created_at', 'updated_at']
     search_fields = ['resource_skill__skill__name', 'resource_skill__resource__name', 'requirement__name']
+    list_filter = ['requirement__name', ('numeric_value', NumericRangeFilter), 'boolean_value']
 
     def resource_skill_link(self, instance):
         try:
@@ -438,6 +473,10 @@ class ConstraintAdmin(admin.ModelAdmin):
     view_on_site = False
     model = models.Constraint
     list_display = [field.name for field in model._meta.fields]
+    # Remove the typed values, which are only used for filtering.
+    list_display.remove('numeric_value')
+    list_display.remove('boolean_value')
+    list_display.remove('text_value')
     # Remove the old element and replace it with a link.
     list_display.remove('part_process_step')
     list_display.insert(1, 'part_process_step_link')
@@ -446,6 +485,7 @@ class ConstraintAdmin(admin.ModelAdmin):
 
     readonly_fields = ['created_at', 'updated_at']
     search_fields = ['part_process_step__process_step__process', 'requirement__name']
+    list_filter = ['requirement__name', ('numeric_value', NumericRangeFilter), 'boolean_value']
 
     def part_process_step_link(self, instance):
         try:
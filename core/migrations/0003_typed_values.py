@@ -0,0 +1,92 @@
+# Generated by Django 3.1.1 on 2026-10-17 19:33
+
+from django.db import migrations, models
+
+
+def get_typed_values(data_type: str, value: str) -> dict:
+    """
+    Convert a value to the typed shadow columns in dependence of the data type of the requirement.
+    Copy of core.models.get_typed_values, so the migration does not depend on the current models.
+    """
+    typed_values = {'numeric_value': None, 'boolean_value': None, 'text_value': None}
+    try:
+        if data_type in ('int', 'float'):
+            typed_values['numeric_value'] = float(int(value) if data_type == 'int' else float(value))
+        elif data_type == 'bool':
+            typed_values['boolean_value'] = bool(value)
+        else:
+            typed_values['text_value'] = str(value)
+    except (TypeError, ValueError):
+        # Conversion is not possible. The value is validated at model level.
+        pass
+    return typed_values
+
+
+def populate_typed_values(apps, schema_editor):
+    """
+    Fill the typed values of the existing abilities and constraints.
+    """
+    for model_name in ('Ability', 'Constraint'):
+        model = apps.get_model('core', model_name)
+        objects = list(model.objects.select_related('requirement'))
+        for obj in objects:
+            for field, typed_value in get_typed_values(obj.requirement.data_type, obj.value).items():
+                setattr(obj, field, typed_value)
+        model.objects.bulk_update(objects, ['numeric_value', 'boolean_value', 'text_value'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_auto_20210422_1656'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ability',
+            name='boolean_value',
+            field=models.BooleanField(blank=True, editable=False, help_text="The value converted to a boolean ('bool' requirements).", null=True),
+        ),
+        migrations.AddField(
+            model_name='ability',
+            name='numeric_value',
+            field=models.FloatField(blank=True, editable=False, help_text="The value converted to a number ('int' and 'float' requirements).", null=True),
+        ),
+        migrations.AddField(
+            model_name='ability',
+            name='text_value',
+            field=models.CharField(blank=True, editable=False, help_text="The value as text ('str' requirements).", max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='constraint',
+            name='boolean_value',
+            field=models.BooleanField(blank=True, editable=False, help_text="The value converted to a boolean ('bool' requirements).", null=True),
+        ),
+        migrations.AddField(
+            model_name='constraint',
+            name='numeric_value',
+            field=models.FloatField(blank=True, editable=False, help_text="The value converted to a number ('int' and 'float' requirements).", null=True),
+        ),
+        migrations.AddField(
+            model_name='constraint',
+            name='text_value',
+            field=models.CharField(blank=True, editable=False, help_text="The value as text ('str' requirements).", max_length=254, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ability',
+            index=models.Index(fields=['requirement', 'numeric_value'], name='core_abilit_require_3e49eb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ability',
+            index=models.Index(fields=['requirement', 'text_value'], name='core_abilit_require_c7ebb5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='constraint',
+            index=models.Index(fields=['requirement', 'numeric_value'], name='core_constr_require_48ebec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='constraint',
+            index=models.Index(fields=['requirement', 'text_value'], name='core_constr_require_1f9a2d_idx'),
+        ),
+        migrations.RunPython(populate_typed_values, migrations.RunPython.noop),
+    ]
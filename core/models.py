@@ -36,6 +36,29 @@ DATATYPES = (
 )
 
 
+# Method for converting values to typed values.
+def get_typed_values(data_type: str, value: str) -> dict:
+    """
+    Convert a value to the typed shadow columns in dependence of the data type of the requirement.
+    Only the column of the data type is filled, the others are None.
+
+    :return: Dictionary containing the column names (numeric_value, boolean_value, text_value) as keys
+    and the typed values as values.
+    """
+    typed_values = {'numeric_value': None, 'boolean_value': None, 'text_value': None}
+    try:
+        if data_type in ('int', 'float'):
+            typed_values['numeric_value'] = float(int(value) if data_type == 'int' else float(value))
+        elif data_type == 'bool':
+            typed_values['boolean_value'] = bool(value)
+        else:
+            typed_values['text_value'] = str(value)
+    except (TypeError, ValueError) as e:
+        # Conversion is not possible. The value is validated at model level.
+        pass
+    return typed_values
+
+
 # Method for uploading parts.
 def model_upload_path(instance, filename):
     # File will be uploaded to MEDIA_ROOT/<filename>
@@ -399,6 +422,16 @@ class Requirement(models.Model):
     def get_absolute_url(self):
         return reverse('requirement-detail', args=[str(self.id)])
 
+    def save(self, *args, **kwargs):
+        previous_data_type = Requirement.objects.filter(pk=self.pk).values_list('data_type', flat=True).first()
+        super(Requirement, self).save(*args, **kwargs)
+        # Update the typed values of the abilities and constraints, if the data type changed.
+        if previous_data_type is not None and previous_data_type != self.data_type:
+            for ability in self.Ability.all():
+                ability.save()
+            for constraint in self.Constraint.all():
+                constraint.save()
+
 
 class ResourceSkill(models.Model):
     """
@@ -557,6 +590,21 @@ class Ability(models.Model):
                                        "Please see the description and unit of the selected "
                                        "requirement for information.",
                              blank=False, )
+    # Typed values (shadow columns) of the value, which are filled on save.
+    numeric_value = models.FloatField(help_text="The value converted to a number ('int' and 'float' requirements).",
+                                      blank=True,
+                                      null=True,
+                                      editable=False)
+    boolean_value = models.BooleanField(help_text="The value converted to a boolean ('bool' requirements).",
+                                        blank=True,
+                                        null=True,
+                                        editable=False)
+    text_value = models.CharField(max_length=254,
+                                  help_text="The value as text ('str' requirements).",
+                                  blank=True,
+                                  null=True,
+                                  editable=False)
+
     # Meta.
     created_at = models.DateTimeField(auto_now_add=True,
                                       editable=False)
@@ -566,6 +614,10 @@ class Ability(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Abilities"
+        indexes = [
+            models.Index(fields=['requirement', 'numeric_value']),
+            models.Index(fields=['requirement', 'text_value']),
+        ]
 
     def clean(self):
         validations.validate_data_type_of_value(self)
@@ -576,6 +628,11 @@ class Ability(models.Model):
     def get_absolute_url(self):
         return reverse('ability-detail', args=[str(self.id)])
 
+    def save(self, *args, **kwargs):
+        for field, typed_value in get_typed_values(self.requirement.data_type, self.value).items():
+            setattr(self, field, typed_value)
+        super(Ability, self).save(*args, **kwargs)
+
 
 class PartProcessStep(models.Model):
     """
@@ -672,6 +729,20 @@ class Constraint(models.Model):
                                              "E.g. material can be plastic OR metal. "
                                              "If only one requirement is optional and their are no alternatives, "
                                              "it is handled like a 'normal' requirement, which has to be fulfilled.")
+    # Typed values (shadow columns) of the value, which are filled on save.
+    numeric_value = models.FloatField(help_text="The value converted to a number ('int' and 'float' requirements).",
+                                      blank=True,
+                                      null=True,
+                                      editable=False)
+    boolean_value = models.BooleanField(help_text="The value converted to a boolean ('bool' requirements).",
+                                        blank=True,
+                                        null=True,
+                                        editable=False)
+    text_value = models.CharField(max_length=254,
+                                  help_text="The value as text ('str' requirements).",
+                                  blank=True,
+                                  null=True,
+                                  editable=False)
 
     # Meta.
     created_at = models.DateTimeField(auto_now_add=True,
@@ -681,6 +752,10 @@ class Constraint(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requirement', 'numeric_value']),
+            models.Index(fields=['requirement', 'text_value']),
+        ]
 
     def __str__(self):
         return str(self.id)
@@ -690,3 +765,8 @@ class Constraint(models.Model):
 
     def get_absolute_url(self):
         return reverse('constraint-detail', args=[str(self.id)])
+
+    def save(self, *args, **kwargs):
+        for field, typed_value in get_typed_values(self.requirement.data_type, self.value).items():
+            setattr(self, field, typed_value)
+        super(Constraint, self).save(*args, **kwargs)
@@ -1,10 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 import logging
 
 # App imports.
 from core import models as core_models
 from solutions.search_solution import search_solution
+from solutions import matching_cache
 
 # Model analysis.
 import trimesh
@@ -78,3 +79,21 @@ def part_saved(sender, instance, created, **kwargs):
     and searches the 'best' resources to manufacture the part.
     """
     search_solution(instance=instance)
+
+
+@receiver(post_save, sender=core_models.Resource)
+@receiver(post_delete, sender=core_models.Resource)
+@receiver(post_save, sender=core_models.ResourceSkill)
+@receiver(post_delete, sender=core_models.ResourceSkill)
+@receiver(post_save, sender=core_models.Ability)
+@receiver(post_delete, sender=core_models.Ability)
+@receiver(post_save, sender=core_models.Skill)
+@receiver(post_delete, sender=core_models.Skill)
+@receiver(post_save, sender=core_models.Requirement)
+@receiver(post_delete, sender=core_models.Requirement)
+def catalog_changed(sender, instance, **kwargs):
+    """
+    This function gets triggered when a part of the catalog is saved or deleted
+    and invalidates the cached matching results.
+    """
+    matching_cache.bump_catalog_version()
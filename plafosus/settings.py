@@ -186,6 +186,64 @@ TEMPLATE_DIRS = os.path.join(BASE_DIR, 'templates'),
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Solution search
+# The engine used for matching the constraints of part process steps with the abilities of resource skills.
+# 'python': Look up the abilities in sorted and hashed ability indexes.
+# 'numpy': Evaluate the constraints as vector comparisons on a dense feasibility matrix.
+# 'sql': Filter the resource skills in the database using Exists subqueries.
+MATCHING_ENGINE = os.environ.get('MATCHING_ENGINE', 'python')
+# Optional alias of a django cache (CACHES), which shares the matching results between several workers.
+MATCHING_CACHE_BACKEND = os.environ.get('MATCHING_CACHE_BACKEND', None)
+# The number of matching results cached in process (0 disables the in-process cache).
+# The cache is invalidated by the catalog changes saved through the models (signals). Without a backend,
+# only the changes of the own process are noticed, so the in-process cache is disabled by default.
+# Changes bypassing the signals (e.g. QuerySet.update, bulk_create) are never noticed:
+# Run solutions.matching_cache.bump_catalog_version() after them.
+MATCHING_CACHE_SIZE = int(os.environ.get('MATCHING_CACHE_SIZE', 1024 if MATCHING_CACHE_BACKEND else 0))
+# The number of workers matching the part process steps of a part in parallel (1 matches them serially).
+MATCHING_WORKERS = int(os.environ.get('MATCHING_WORKERS', 1))
+# The pool of the workers: 'thread' or 'process' (only for the 'python' and 'numpy' matching engines).
+MATCHING_EXECUTOR = os.environ.get('MATCHING_EXECUTOR', 'thread')
+# Save the diagnostics of the matching (considered and rejected resource skills per part process step
+# and constraint) with the solution space. Then a solution space is also saved, if there is no solution.
+MATCHING_DIAGNOSTICS = os.environ.get('MATCHING_DIAGNOSTICS', 'False') == 'True'
+# The number of permutations, which are calculated and saved in one transaction.
+# The permutations are created lazily, so the memory only depends on the batch size.
+PERMUTATION_BATCH_SIZE = int(os.environ.get('PERMUTATION_BATCH_SIZE', 1000))
+# The strategy for creating the permutations of a solution space.
+# 'full': Save all permutations.
+# 'pareto': Save only the permutations, which are not dominated in price, time and CO2-eq. by another permutation.
+#           If the permutations of the pruned resource skills exceed SOLUTION_SPACE_MAX_PERMUTATIONS,
+#           the approximate Pareto front is searched instead ('heuristic').
+# 'top_k': Save only the SOLUTION_SPACE_TOP_K best permutations regarding the evaluation method of the part
+#          (evaluation method 1 and 2, otherwise all permutations are saved).
+# 'sampled': Save only a uniform random sample of SOLUTION_SPACE_SAMPLE_SIZE permutations
+#            (the same sample for the same SOLUTION_SPACE_SEED).
+# 'heuristic': Save only the approximate Pareto front, which is searched with an evolutionary algorithm (NSGA-II)
+#              within SOLUTION_SPACE_HEURISTIC_BUDGET evaluated permutations and a population of
+#              SOLUTION_SPACE_HEURISTIC_POPULATION permutations (the same front for the same SOLUTION_SPACE_SEED).
+SOLUTION_SPACE_STRATEGY = os.environ.get('SOLUTION_SPACE_STRATEGY', 'full')
+SOLUTION_SPACE_TOP_K = int(os.environ.get('SOLUTION_SPACE_TOP_K', 20))
+SOLUTION_SPACE_SAMPLE_SIZE = int(os.environ.get('SOLUTION_SPACE_SAMPLE_SIZE', 10000))
+SOLUTION_SPACE_SEED = int(os.environ.get('SOLUTION_SPACE_SEED', 0))
+SOLUTION_SPACE_HEURISTIC_BUDGET = int(os.environ.get('SOLUTION_SPACE_HEURISTIC_BUDGET', 100000))
+SOLUTION_SPACE_HEURISTIC_POPULATION = int(os.environ.get('SOLUTION_SPACE_HEURISTIC_POPULATION', 100))
+# The size of the solution space is estimated before creating the permutations.
+# If all permutations shall be saved ('full'), but more than SOLUTION_SPACE_MAX_PERMUTATIONS permutations
+# or more than SOLUTION_SPACE_MAX_BYTES bytes are estimated, the SOLUTION_SPACE_BOUNDED_STRATEGY
+# ('top_k', 'sampled' or 'heuristic') is used instead.
+# 'top_k' is replaced by 'sampled' for the evaluation method 3.
+SOLUTION_SPACE_MAX_PERMUTATIONS = int(os.environ.get('SOLUTION_SPACE_MAX_PERMUTATIONS', 100000))
+SOLUTION_SPACE_MAX_BYTES = int(os.environ.get('SOLUTION_SPACE_MAX_BYTES', 1024 ** 3))
+SOLUTION_SPACE_BOUNDED_STRATEGY = os.environ.get('SOLUTION_SPACE_BOUNDED_STRATEGY', 'heuristic')
+# The storage of the permutations of a solution space.
+# 'rows': Save each permutation with its solutions and consumables.
+# 'packed': Save all permutations as arrays in one file (MEDIA_ROOT/solution_spaces/).
+#           The permutations of a rank are only saved as rows, when the rank is opened in the admin.
+SOLUTION_SPACE_STORAGE = os.environ.get('SOLUTION_SPACE_STORAGE', 'rows')
+# The maximum number of packed permutations of a rank, which are saved as rows, when the rank is opened.
+SOLUTION_SPACE_MATERIALIZE_LIMIT = int(os.environ.get('SOLUTION_SPACE_MATERIALIZE_LIMIT', 100))
+
 # URL Handling
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
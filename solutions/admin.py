@@ -1,12 +1,45 @@
 from django.contrib import admin
+from django.contrib import messages
+from django.contrib.auth import get_permission_codename
+from django.core.exceptions import PermissionDenied
+from django.forms.models import BaseInlineFormSet
+from django.http import HttpResponseNotAllowed
+from core import models as core_models
 from solutions import models
-from django.urls import reverse
+from solutions import packed
+from django.urls import reverse, path
+from django.shortcuts import redirect, get_object_or_404
 from django.utils.safestring import mark_safe
+from django.utils.html import format_html
+
+import numpy as np
+
+
+class ConsumableCostFormSet(BaseInlineFormSet):
+    """
+    Only the used consumables are saved as consumable costs of a solution or permutation.
+    So the missing consumables are added with zero costs (without saving them).
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_consumable_costs'):
+            consumable_costs = list(super(ConsumableCostFormSet, self).get_queryset().select_related(
+                'consumablecost__consumable'))
+            used_consumables = [consumable_cost.consumablecost.consumable_id for consumable_cost in consumable_costs]
+            for consumable in core_models.Consumable.objects.exclude(pk__in=used_consumables):
+                consumable_costs.append(self.model(**{
+                    self.fk.name: self.instance,
+                    'consumablecost': models.ConsumableCost(consumable=consumable,
+                                                            is_overall=self.fk.name == 'permutation')}))
+            self._consumable_costs = sorted(consumable_costs,
+                                            key=lambda consumable_cost: consumable_cost.consumablecost.consumable.name)
+        return self._consumable_costs
 
 
 class PermutationConsumableCostInline(admin.TabularInline):
     view_on_site = False
     model = models.Permutation.consumables.through
+    formset = ConsumableCostFormSet
     extra = 0
     can_delete = False
     can_add = False
@@ -84,6 +117,7 @@ class PermutationConsumableCostInline(admin.TabularInline):
 class SolutionConsumableCostInline(admin.TabularInline):
     view_on_site = False
     model = models.Solution.consumables.through
+    formset = ConsumableCostFormSet
     extra = 0
     can_delete = False
     can_add = False
@@ -514,13 +548,30 @@ class SolutionSpaceAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
-    list_display = ['id', 'part_link', 'created_at', 'updated_at']
-    readonly_fields = ['part_link', 'created_at', 'updated_at']
+    list_display = ['id', 'part_link', 'status', 'progress', 'strategy', 'storage', 'created_at', 'updated_at']
+    readonly_fields = ['part_link', 'status', 'progress', 'cursor',
+                       'strategy', 'estimate', 'pruned_permutations', 'bounds', 'storage', 'packed_link',
+                       'diagnostics_link', 'created_at', 'updated_at']
     inlines = [SolutionSpacePermutationsInline]
 
+    packed_ranks = 20
+    """The number of ranks of the packed permutations, which are shown."""
+
     fieldsets = (
         ('Solution Space', {
-            'fields': ('part_link',)
+            'fields': ('part_link', 'strategy', 'estimate', 'pruned_permutations', 'bounds')
+        }),
+        ('Progress', {
+            'fields': ('status', 'progress', 'cursor')
+        }),
+        ('Packed Permutations', {
+            'fields': ('storage', 'packed_link')
+        }),
+        ('Matching Diagnostics', {
+
+            'classes': ('collapse',),
+
+            'fields': ('diagnostics_link',)
         }),
         ('Optional Information', {
 
@@ -539,3 +590,91 @@ class SolutionSpaceAdmin(admin.ModelAdmin):
             return "-"
 
     part_link.short_description = 'Part'
+
+    def progress(self, instance):
+        try:
+            if not instance.total_permutations:
+                return "-"
+            return "{0} / {1} ({2:.1f} %)".format(instance.processed_permutations,
+                                                instance.total_permutations,
+                                                100 * instance.processed_permutations / instance.total_permutations)
+        except:
+            return "-"
+
+    progress.short_description = 'Saved permutations'
+
+    def diagnostics_link(self, instance):
+        try:
+            if not instance.diagnostics:
+                return "-"
+            rows = ''
+            for step in instance.diagnostics:
+                rejected = ', '.join('%s %s %s: %s rejected, %s missing ability' % (
+                    constraint['requirement'], constraint['operator'], constraint['value'],
+                    constraint['rejected'], constraint['missing_ability'])
+                                     for constraint in step['constraints'])
+                rows += format_html('<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+                                    step['manufacturing_possibility'], step['manufacturing_sequence_number'],
+                                    step['process_step'], step['considered'], step['matched'], rejected)
+            return mark_safe('<table><tr><th>Possibility</th><th>Sequence Number</th><th>Process Step</th>'
+                             '<th>Considered</th><th>Matched</th><th>Constraints</th></tr>%s</table>' % rows)
+        except:
+            return "-"
+
+    diagnostics_link.short_description = 'Diagnostics'
+
+    def packed_link(self, instance):
+        try:
+            if instance.storage != 'packed' or not instance.packed_permutations:
+                return "-"
+            permutations = packed.PackedPermutations.load_ranking(instance)
+            rows = ''
+            # Show the best ranks. The permutations of a rank are saved, when the rank is opened.
+            # The button posts the change form (incl. its csrf token) to the materialize view.
+            for row in np.argsort(permutations.arrays['rank'], kind='stable')[:self.packed_ranks]:
+                rank = int(permutations.arrays['rank'][row])
+                url = reverse('admin:solutions_solutionspace_materialize', args=[instance.pk, rank])
+                comparison_value = permutations.arrays['comparison_value'][row]
+                rows += format_html('<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td>'
+                                    '<td><button type="submit" formaction="{}">Show</button></td></tr>',
+                                    rank,
+                                    '-' if np.isnan(comparison_value) else round(float(comparison_value), 3),
+                                    permutations.tables[permutations.arrays['table_indexes'][row]][
+                                        'manufacturing_possibility'],
+                                    float(permutations.arrays['price'][row]),
+                                    float(permutations.arrays['time'][row]),
+                                    float(permutations.arrays['co2'][row]),
+                                    url)
+            return mark_safe('<p>%s permutations</p><table><tr><th>Rank</th><th>Comparison Value</th>'
+                             '<th>Manufacturing Possibility</th><th>Price</th><th>Time</th><th>CO2</th>'
+                             '<th>Show details</th></tr>%s</table>' % (len(permutations), rows))
+        except:
+            return "-"
+
+    packed_link.short_description = 'Permutations'
+
+    def get_urls(self):
+        urls = super(SolutionSpaceAdmin, self).get_urls()
+        return [path('<uuid:object_id>/materialize/<int:rank>/',
+                     self.admin_site.admin_view(self.materialize_view),
+                     name='solutions_solutionspace_materialize')] + urls
+
+    def materialize_view(self, request, object_id, rank):
+        """
+        Save the packed permutations of a rank and show the (first) permutation.
+        Since permutations are saved, only POST requests of users, who may add permutations, are accepted.
+        """
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        solution_space = get_object_or_404(models.SolutionSpace, pk=object_id)
+        opts = models.Permutation._meta
+        if not (self.has_view_permission(request, solution_space) and
+                request.user.has_perm('{0}.{1}'.format(opts.app_label, get_permission_codename('add', opts)))):
+            raise PermissionDenied
+        if rank < 1:
+            messages.error(request, "Only ranked permutations (rank 1 or higher) can be shown.")
+            return redirect('admin:solutions_solutionspace_change', solution_space.pk)
+        permutations = packed.materialize(solution_space, rank)
+        if not permutations:
+            return redirect('admin:solutions_solutionspace_change', solution_space.pk)
+        return redirect('admin:solutions_permutation_change', permutations[0].pk)
@@ -0,0 +1,516 @@
+"""
+Implementation of the vectorized costing of permutations.
+
+The price, time and CO2 of a permutation are sums over its part process steps
+(fixed + required quantity * variable of the resource skill plus the costs of its consumables).
+Therefore, one cost vector per part process step and criterion is calculated, which contains the costs
+of every candidate resource skill of the part process step.
+
+A permutation is represented by its choices: the index of the chosen resource skill in the candidate list
+of each part process step. The position of a permutation in the order of itertools.product is a mixed radix
+number with the choices as digits, so the choices of a chunk of positions are calculated with numpy.
+The totals of a chunk are the sums of the indexed cost vectors.
+The consumables of all candidates are loaded with one query into a dense matrix of coefficients
+(see ConsumableMatrix), so their costs are calculated with matrix arithmetic.
+
+Since all criteria are additive, a resource skill, which is dominated by another candidate of the same
+part process step (worse or equal in price, time and CO2), only leads to dominated permutations.
+Therefore, the Pareto front of a solution space is searched after pruning the dominated candidates.
+For the same reason, the best permutations regarding a score, which is the sum of the scores of the
+resource skills, are found without enumerating all permutations (see get_best).
+Large solution spaces can also be sampled uniformly without enumerating them (see get_sample).
+"""
+import heapq
+
+import numpy as np
+
+from core import models as core_models
+
+CRITERIA = ('price', 'time', 'co2')
+"""The criteria of a permutation."""
+
+CONSUMABLE_CRITERIA = ('quantity', 'price', 'co2')
+"""The criteria of a consumable."""
+
+
+class ConsumableMatrix:
+    """
+    The consumable coefficients of resource skills as dense matrices (shape: resource skills x consumables).
+
+    The quantity of a consumable is linear in the required quantity of the part process step:
+    quantity = required quantity * variable quantity + fixed quantity. Since the price and co2 of a consumable
+    are proportional to its quantity, they are linear as well. A resource skill can have the same consumable
+    multiple times, so the coefficients are the sums over its resource skill consumables.
+    """
+
+    COEFFICIENTS = ('variable_quantity', 'fixed_quantity', 'variable_price', 'fixed_price',
+                    'variable_co2', 'fixed_co2')
+
+    def __init__(self, consumables: list, resource_skill_indexes: dict, coefficients: dict):
+        """
+        :param consumables: List of all registered consumables (the columns).
+        :param resource_skill_indexes: Dictionary containing the id of each resource skill and its row.
+        :param coefficients: Dictionary containing the matrix of each coefficient.
+        """
+        self.consumables = consumables
+        self.resource_skill_indexes = resource_skill_indexes
+        self.coefficients = coefficients
+
+    @classmethod
+    def load(cls, resource_skills: list, consumables: list):
+        """
+        Load the resource skill consumables of the given resource skills with one query.
+
+        :param resource_skills: List of resource skills.
+        :param consumables: List of all registered consumables.
+        return: The consumable matrix.
+        """
+        resource_skill_indexes = {}
+        for resource_skill in resource_skills:
+            resource_skill_indexes.setdefault(resource_skill.pk, len(resource_skill_indexes))
+        consumable_indexes = {consumable.pk: j for j, consumable in enumerate(consumables)}
+        coefficients = {coefficient: np.zeros((len(resource_skill_indexes), len(consumables)), dtype=float)
+                        for coefficient in cls.COEFFICIENTS}
+
+        rows = list(core_models.SkillConsumable.objects.filter(
+            resource_skill_id__in=list(resource_skill_indexes.keys())).values_list(
+            'resource_skill_id', 'consumable_id', 'variable_quantity', 'fixed_quantity', 'price', 'co2'))
+        rows = [row for row in rows if row[1] in consumable_indexes]
+        if rows:
+            resource_skill_ids, consumable_ids, variable_quantity, fixed_quantity, price, co2 = zip(*rows)
+            index = (np.array([resource_skill_indexes[resource_skill_id] for resource_skill_id in resource_skill_ids]),
+                     np.array([consumable_indexes[consumable_id] for consumable_id in consumable_ids]))
+            variable_quantity = np.array(variable_quantity, dtype=float)
+            fixed_quantity = np.array(fixed_quantity, dtype=float)
+            price = np.array(price, dtype=float)
+            co2 = np.array(co2, dtype=float)
+            # Sum the coefficients of the same consumable of a resource skill.
+            np.add.at(coefficients['variable_quantity'], index, variable_quantity)
+            np.add.at(coefficients['fixed_quantity'], index, fixed_quantity)
+            np.add.at(coefficients['variable_price'], index, variable_quantity * price)
+            np.add.at(coefficients['fixed_price'], index, fixed_quantity * price)
+            np.add.at(coefficients['variable_co2'], index, variable_quantity * co2)
+            np.add.at(coefficients['fixed_co2'], index, fixed_quantity * co2)
+        return cls(consumables, resource_skill_indexes, coefficients)
+
+    def get_consumable_costs(self, resource_skills: list, quantity: float) -> dict:
+        """
+        Calculate the consumables of resource skills performing a part process step.
+
+        :param resource_skills: List of resource skills.
+        :param quantity: The required quantity of the part process step.
+        return: Dictionary containing the quantity, price and co2 of the consumables
+        (arrays with the shape: resource skills x consumables).
+        """
+        rows = np.array([self.resource_skill_indexes[resource_skill.pk] for resource_skill in resource_skills],
+                        dtype=np.int64)
+        return {criterion: quantity * self.coefficients['variable_' + criterion][rows] +
+                           self.coefficients['fixed_' + criterion][rows]
+                for criterion in CONSUMABLE_CRITERIA}
+
+
+def get_non_dominated(values: np.ndarray) -> np.ndarray:
+    """
+    Find the points, which are not dominated by another point. All criteria are minimized.
+    A point dominates another one, if it is not worse in any criterion and better in at least one.
+    Equal points do not dominate each other.
+
+    :param values: Array with one row per point and one column per criterion.
+    return: Boolean mask of the non-dominated points.
+    """
+    non_dominated = np.zeros(len(values), dtype=bool)
+    # In lexicographic order, a point can only be dominated by the points before it.
+    # So the first remaining point is never dominated and removes the points dominated by it.
+    candidates = np.lexsort(values.T[::-1])
+    while len(candidates):
+        point = values[candidates[0]]
+        non_dominated[candidates[0]] = True
+        candidates = candidates[1:]
+        remaining = values[candidates]
+        dominated = np.all(remaining >= point, axis=1) & np.any(remaining > point, axis=1)
+        candidates = candidates[~dominated]
+    return non_dominated
+
+
+class CostTable:
+    """
+    The costs of the candidate resource skills of all part process steps of a manufacturing possibility.
+    The costs of each (part process step, resource skill) pair are calculated once
+    and all permutations are assembled from them.
+    """
+
+    def __init__(self, manufacturing_possibility, part_process_steps: list, resource_skills: list, costs: dict,
+                 consumables: list, consumable_costs: list):
+        """
+        :param manufacturing_possibility: The number of the manufacturing possibility.
+        :param part_process_steps: List of the part process steps.
+        :param resource_skills: List containing the list of candidate resource skills of each part process step.
+        :param costs: Dictionary containing for each criterion the list of cost vectors (one per part process step).
+        :param consumables: List of all registered consumables.
+        :param consumable_costs: List containing for each part process step a dictionary with the quantity, price
+        and co2 of the consumables of the candidates (arrays with the shape: candidates x consumables).
+        """
+        self.manufacturing_possibility = manufacturing_possibility
+        self.part_process_steps = part_process_steps
+        self.resource_skills = resource_skills
+        self.costs = costs
+        self.consumables = consumables
+        self.consumable_costs = consumable_costs
+        self.shape = tuple(len(candidates) for candidates in resource_skills)
+        """The number of candidates of each part process step (the radixes of the positions)."""
+
+    @classmethod
+    def create(cls, manufacturing_possibility, process_steps_with_resource_skills: dict,
+               consumable_matrix: ConsumableMatrix):
+        """
+        Calculate the costs of the candidates of a manufacturing possibility.
+
+        :param manufacturing_possibility: The number of the manufacturing possibility.
+        :param process_steps_with_resource_skills: Dictionary containing the part process steps
+        and the according possible resource skills.
+        :param consumable_matrix: The consumable matrix containing all candidates.
+        return: The cost table.
+        """
+        part_process_steps = list(process_steps_with_resource_skills.keys())
+        resource_skills = [list(candidates) for candidates in process_steps_with_resource_skills.values()]
+        costs = {criterion: [] for criterion in CRITERIA}
+        consumable_costs = []
+        for part_process_step, candidates in zip(part_process_steps, resource_skills):
+            quantity = part_process_step.required_quantity
+            step_consumable_costs = consumable_matrix.get_consumable_costs(candidates, quantity)
+            consumable_costs.append(step_consumable_costs)
+            # The costs are the sum of the fixed costs and the variable costs multiplied with the required quantity
+            # plus the costs of the consumables.
+            for criterion in CRITERIA:
+                fixed = np.array([getattr(resource_skill, 'fixed_' + criterion) for resource_skill in candidates],
+                                 dtype=float)
+                variable = np.array([getattr(resource_skill, 'variable_' + criterion)
+                                     for resource_skill in candidates], dtype=float)
+                vector = fixed + quantity * variable
+                if criterion in step_consumable_costs:
+                    vector += step_consumable_costs[criterion].sum(axis=1)
+                costs[criterion].append(vector)
+        return cls(manufacturing_possibility, part_process_steps, resource_skills, costs,
+                   consumable_matrix.consumables, consumable_costs)
+
+    @property
+    def size(self) -> int:
+        """
+        The number of permutations (as python int, so it can not overflow).
+        """
+        size = 1
+        for length in self.shape:
+            size *= length
+        return size
+
+    def get_choices(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Calculate the choices of the permutations at the given positions.
+
+        :param positions: Array of positions in the order of itertools.product.
+        return: Array with one row of candidate indexes per permutation (shape: permutations x part process steps).
+        """
+        return np.stack(np.unravel_index(positions, self.shape), axis=1)
+
+    def get_totals(self, choices: np.ndarray) -> dict:
+        """
+        Calculate the total costs of the given permutations.
+
+        :param choices: Array with one row of candidate indexes per permutation.
+        return: Dictionary containing for each criterion the array of the totals of the permutations.
+        """
+        totals = {}
+        for criterion in CRITERIA:
+            total = np.zeros(len(choices), dtype=float)
+            for step, vector in enumerate(self.costs[criterion]):
+                total += vector[choices[:, step]]
+            totals[criterion] = total
+        return totals
+
+    def get_consumable_totals(self, choices: np.ndarray) -> dict:
+        """
+        Calculate the overall consumables of the given permutations.
+
+        :param choices: Array with one row of candidate indexes per permutation.
+        return: Dictionary containing the quantity, price and co2 of the consumables of the permutations
+        (arrays with the shape: permutations x consumables).
+        """
+        totals = {}
+        for criterion in CONSUMABLE_CRITERIA:
+            total = np.zeros((len(choices), len(self.consumables)), dtype=float)
+            for step, step_consumable_costs in enumerate(self.consumable_costs):
+                total += step_consumable_costs[criterion][choices[:, step]]
+            totals[criterion] = total
+        return totals
+
+    def get_chunks(self, chunk_size: int, start: int = 0):
+        """
+        Iterate over all permutations in chunks.
+
+        :param chunk_size: The maximum number of permutations of a chunk.
+        :param start: The position of the first permutation.
+        return: Generator of tuples containing the positions, the choices and the totals of a chunk.
+        """
+        size = self.size
+        for chunk_start in range(start, size, chunk_size):
+            positions = np.arange(chunk_start, min(chunk_start + chunk_size, size), dtype=np.int64)
+            choices = self.get_choices(positions)
+            yield positions, choices, self.get_totals(choices)
+
+    def get_pruned(self):
+        """
+        Remove the candidates, which are dominated by another candidate of the same part process step.
+
+        return: New cost table containing only the non-dominated candidates.
+        """
+        resource_skills = []
+        costs = {criterion: [] for criterion in CRITERIA}
+        consumable_costs = []
+        for step, candidates in enumerate(self.resource_skills):
+            non_dominated = get_non_dominated(np.column_stack([self.costs[criterion][step]
+                                                               for criterion in CRITERIA]))
+            resource_skills.append([resource_skill for resource_skill, keep in zip(candidates, non_dominated)
+                                    if keep])
+            for criterion in CRITERIA:
+                costs[criterion].append(self.costs[criterion][step][non_dominated])
+            consumable_costs.append({criterion: values[non_dominated]
+                                     for criterion, values in self.consumable_costs[step].items()})
+        return CostTable(self.manufacturing_possibility, self.part_process_steps, resource_skills, costs,
+                         self.consumables, consumable_costs)
+
+
+def get_bounds(cost_tables: list) -> dict:
+    """
+    Calculate the minimum and maximum of each criterion over all permutations of the cost tables.
+    Since the criteria are additive, these are the sums of the minimums and maximums of the cost vectors.
+
+    :param cost_tables: List of cost tables.
+    return: Dictionary containing for each criterion the list [minimum, maximum].
+    """
+    bounds = {}
+    for criterion in CRITERIA:
+        bounds[criterion] = [min(float(sum(vector.min() for vector in cost_table.costs[criterion]))
+                                 for cost_table in cost_tables),
+                             max(float(sum(vector.max() for vector in cost_table.costs[criterion]))
+                                 for cost_table in cost_tables)]
+    return bounds
+
+
+def get_chunks(cost_tables: list, chunk_size: int, start: int = 0):
+    """
+    Iterate over all permutations of the cost tables in chunks.
+
+    :param cost_tables: List of cost tables.
+    :param chunk_size: The maximum number of permutations of a chunk.
+    :param start: The number of permutations, which are skipped (in the order of the cost tables).
+    return: Generator of tuples containing the cost table, the choices and the totals of a chunk.
+    """
+    for cost_table in cost_tables:
+        size = cost_table.size
+        if start >= size:
+            start -= size
+            continue
+        for positions, choices, totals in cost_table.get_chunks(chunk_size, start):
+            yield cost_table, choices, totals
+        start = 0
+
+
+def get_choice_chunks(selection: list, chunk_size: int):
+    """
+    Iterate over the selected permutations of cost tables in chunks.
+
+    :param selection: List of tuples containing the cost table and the choices of its selected permutations.
+    :param chunk_size: The maximum number of permutations of a chunk.
+    return: Generator of tuples containing the cost table, the choices and the totals of a chunk.
+    """
+    for cost_table, choices in selection:
+        for chunk_start in range(0, len(choices), chunk_size):
+            chunk = choices[chunk_start:chunk_start + chunk_size]
+            yield cost_table, chunk, cost_table.get_totals(chunk)
+
+
+def skip_permutations(chunks, start: int):
+    """
+    Skip the first permutations of chunks.
+
+    :param chunks: Iterable of tuples containing the cost table, the choices and the totals of a chunk.
+    :param start: The number of permutations, which are skipped.
+    return: Generator of the remaining chunks.
+    """
+    for cost_table, choices, totals in chunks:
+        if start >= len(choices):
+            start -= len(choices)
+            continue
+        if start:
+            choices = choices[start:]
+            totals = {criterion: values[start:] for criterion, values in totals.items()}
+            start = 0
+        yield cost_table, choices, totals
+
+
+def get_sample(cost_tables: list, sample_size: int, seed: int):
+    """
+    Draw a uniform random sample of the permutations of the cost tables without enumerating them.
+
+    The number of permutations of each cost table is drawn in proportion to its size and the choice of each
+    part process step is drawn independently, so every permutation has the same probability. Permutations, which
+    are drawn twice, are only returned once. The sample is the same for the same seed.
+
+    :param cost_tables: List of cost tables.
+    :param sample_size: The number of drawn permutations.
+    :param seed: The seed of the random number generator.
+    return: Generator of tuples containing the cost table and the choices of its sampled permutations.
+    """
+    generator = np.random.default_rng(seed)
+    # The sizes are floats, since the number of permutations can exceed the range of int64.
+    sizes = np.array([float(cost_table.size) for cost_table in cost_tables])
+    counts = generator.multinomial(sample_size, sizes / sizes.sum())
+    for cost_table, count in zip(cost_tables, counts):
+        if count:
+            choices = np.column_stack([generator.integers(0, length, count) for length in cost_table.shape])
+            yield cost_table, np.unique(choices, axis=0)
+
+
+def get_best(cost_tables: list, get_scores, k: int):
+    """
+    Find the k permutations with the lowest scores without enumerating all permutations (k-best enumeration).
+
+    The score of a permutation is the sum of the scores of its resource skills. Scores are vectors,
+    which are compared lexicographically (a scalar score is a vector with one element).
+    The candidates of each part process step are sorted by their score. Starting with the permutation
+    of the best candidates, a priority queue is expanded with the successors of the best permutation found:
+    the permutations with the next worse candidate at one part process step. To create every permutation only once,
+    only the part process steps from the last changed part process step onwards are changed.
+
+    :param cost_tables: List of cost tables.
+    :param get_scores: Callable, which gets a cost table and the index of a part process step and returns
+    the array of the scores of the candidates (shape: candidates x score elements).
+    :param k: The number of permutations.
+    return: The selection of the k best permutations.
+    """
+    selection = PermutationSelection()
+    queue = []
+    """Priority queue of tuples containing the score, the index of the cost table,
+    the ranks of the chosen candidates in the sorted candidates and the last changed part process step."""
+    orders = []
+    """List containing for each cost table the list of sorted candidate indexes of each part process step."""
+    sorted_scores = []
+    """List containing for each cost table the list of sorted candidate scores of each part process step."""
+
+    def get_score(table_index, ranks):
+        return tuple(float(value) for value in sum(scores[rank] for scores, rank
+                                                   in zip(sorted_scores[table_index], ranks)))
+
+    for table_index, cost_table in enumerate(cost_tables):
+        scores = [np.asarray(get_scores(cost_table, step), dtype=float).reshape(length, -1)
+                  for step, length in enumerate(cost_table.shape)]
+        orders.append([np.lexsort(step_scores.T[::-1]) for step_scores in scores])
+        sorted_scores.append([step_scores[order] for step_scores, order in zip(scores, orders[table_index])])
+        ranks = (0,) * len(cost_table.shape)
+        heapq.heappush(queue, (get_score(table_index, ranks), table_index, ranks, 0))
+
+    while queue and len(selection) < k:
+        score, table_index, ranks, last_step = heapq.heappop(queue)
+        cost_table = cost_tables[table_index]
+        choice = [int(order[rank]) for order, rank in zip(orders[table_index], ranks)]
+        selection.add(cost_table, np.array([choice], dtype=np.int64))
+        for step in range(last_step, len(ranks)):
+            if ranks[step] + 1 < cost_table.shape[step]:
+                successor = ranks[:step] + (ranks[step] + 1,) + ranks[step + 1:]
+                heapq.heappush(queue, (get_score(table_index, successor), table_index, successor, step))
+    return selection
+
+
+class PermutationSelection:
+    """
+    A selection of permutations of several cost tables.
+    A permutation is stored as the index of its cost table and its choices, since the positions of the permutations
+    of large cost tables exceed the range of int64. The choices are filled with -1 for cost tables with less
+    part process steps.
+    """
+
+    def __init__(self):
+        self.cost_tables = []
+        self.table_indexes = np.zeros(0, dtype=np.int64)
+        self.choices = np.zeros((0, 0), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.table_indexes)
+
+    def get_table_index(self, cost_table: CostTable) -> int:
+        """
+        Get the index of the cost table. The cost table is added, if it is not part of the selection yet.
+        """
+        for table_index, selected_cost_table in enumerate(self.cost_tables):
+            if selected_cost_table is cost_table:
+                return table_index
+        self.cost_tables.append(cost_table)
+        return len(self.cost_tables) - 1
+
+    def concatenate(self, cost_table: CostTable, choices: np.ndarray):
+        """
+        Append permutations to the selected permutations.
+
+        :param cost_table: The cost table of the permutations.
+        :param choices: Array with one row of candidate indexes per permutation.
+        return: Tuple containing the table indexes and the choices of the selected and the appended permutations.
+        """
+        choices = np.asarray(choices, dtype=np.int64).reshape(-1, len(cost_table.shape))
+        steps = max(self.choices.shape[1], choices.shape[1])
+        table_indexes = np.concatenate([self.table_indexes,
+                                        np.full(len(choices), self.get_table_index(cost_table), dtype=np.int64)])
+        choices = np.concatenate([np.pad(self.choices, ((0, 0), (0, steps - self.choices.shape[1])),
+                                         constant_values=-1),
+                                  np.pad(choices, ((0, 0), (0, steps - choices.shape[1])), constant_values=-1)])
+        return table_indexes, choices
+
+    def add(self, cost_table: CostTable, choices: np.ndarray):
+        """
+        Add permutations to the selection.
+
+        :param cost_table: The cost table of the permutations.
+        :param choices: Array with one row of candidate indexes per permutation.
+        """
+        self.table_indexes, self.choices = self.concatenate(cost_table, choices)
+
+    def get_chunks(self, chunk_size: int):
+        """
+        Iterate over the selected permutations in chunks.
+        The permutations of a cost table are sorted in the order of itertools.product.
+
+        :param chunk_size: The maximum number of permutations of a chunk.
+        return: Generator of tuples containing the cost table, the choices and the totals of a chunk.
+        """
+        for table_index, cost_table in enumerate(self.cost_tables):
+            choices = self.choices[self.table_indexes == table_index, :len(cost_table.shape)]
+            choices = choices[np.lexsort(choices.T[::-1])]
+            for chunk_start in range(0, len(choices), chunk_size):
+                chunk = choices[chunk_start:chunk_start + chunk_size]
+                yield cost_table, chunk, cost_table.get_totals(chunk)
+
+
+class ParetoFront(PermutationSelection):
+    """
+    The non-dominated permutations of several cost tables, which is updated chunk by chunk.
+    """
+
+    def __init__(self):
+        super(ParetoFront, self).__init__()
+        self.values = np.zeros((0, len(CRITERIA)), dtype=float)
+
+    def add(self, cost_table: CostTable, choices: np.ndarray, totals: dict = None):
+        """
+        Merge a chunk of permutations into the Pareto front.
+
+        :param cost_table: The cost table of the permutations.
+        :param choices: Array with one row of candidate indexes per permutation.
+        :param totals: Dictionary containing for each criterion the array of the totals of the permutations.
+        """
+        if totals is None:
+            totals = cost_table.get_totals(choices)
+        table_indexes, choices = self.concatenate(cost_table, choices)
+        values = np.concatenate([self.values, np.column_stack([totals[criterion] for criterion in CRITERIA])])
+        non_dominated = get_non_dominated(values)
+        self.table_indexes = table_indexes[non_dominated]
+        self.choices = choices[non_dominated]
+        self.values = values[non_dominated]
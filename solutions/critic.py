@@ -6,13 +6,17 @@ Source: D. Diakoulaki, G. Mavrotas, and L. Papayannakis:
         Comput. Oper. Res., Bd. 22, Nr. 7, S. 763–770, 1995.
 """
 from django.db.models import Max, Min
-import operator
 import logging
 
+import numpy as np
+
 from solutions import models as solution_models
 
 logger = logging.getLogger(__name__)
 
+CRITERIA = ('price', 'time', 'co2')
+"""The criteria of the permutations, which are evaluated."""
+
 
 def normalize(solution_space: solution_models.SolutionSpace,
               permutation: solution_models.Permutation,
@@ -21,25 +25,18 @@ def normalize(solution_space: solution_models.SolutionSpace,
     """
     Calculate the normalized value using the Min-Max-Normalization.
     1 is "best" and 0 is "worst".
+    To normalize the values of all permutations, load them once (see get_values) and use normalize_values.
 
     :return: The normalized value.
     """
     try:
-        # Get the permutations ordered to the
-        min_value = list(solution_space.permutations.aggregate(Min(attribute)).values())[0]
-        max_value = list(solution_space.permutations.aggregate(Max(attribute)).values())[0]
-
-        # If min == max, then this criteria has no influence on the overall decision.
-        if min_value == max_value:
-            return 0
-
-        # Calculate the normalized value.
-        if max_best:
-            normalized_value = (getattr(permutation, attribute) - min_value) / (max_value - min_value)
+        if solution_space.bounds:
+            # Not all permutations are saved. So the bounds of all permutations are used.
+            bounds = [solution_space.bounds[attribute]]
         else:
-            normalized_value = (getattr(permutation, attribute) - max_value) / (min_value - max_value)
-
-        return abs(normalized_value)
+            aggregate = solution_space.permutations.aggregate(min_value=Min(attribute), max_value=Max(attribute))
+            bounds = [[aggregate['min_value'], aggregate['max_value']]]
+        return float(normalize_values([[getattr(permutation, attribute)]], bounds=bounds, max_best=max_best)[0, 0])
     except Exception as e:
         logger.error("Could not normalize the given permutation attributes of solution space '{0}'."
                      .format(str(solution_space.pk)), exc_info=True)
@@ -53,36 +50,118 @@ def rank(solution_space: solution_models.SolutionSpace,
     The greater the rank_value, the better is the permutation.
     """
     try:
-        # Sort the permutation list in dependence of the rank_values.
-        # The greater the value, the better is the permutation.
-        sorted_permutations = [[val, per] for val, per in sorted(zip(rank_values,
-                                                                     list(solution_space.permutations.all())),
-                                                                 key=operator.itemgetter(0),
-                                                                 reverse=True)]
-
-        i = 1
-        """The rank number."""
-        previous_value = None
-        """The previous ranked value, used for checking, if the comparison value was the same."""
-        for ranked_permutation in sorted_permutations:
-            value = ranked_permutation[0]
-            permutation = ranked_permutation[1]
-            # Check if it has the same value (and consequently the same rank).
-            if value == previous_value:
-                # Write the ranks in dependence of the permutations queryset.
-                permutation.rank = i - 1
-                permutation.comparison_value = value
-                permutation.save()
-            # Not the same value. Not so good, as the previous one. Consequently next rank value.
-            else:
-                # Write the ranks in dependence of the permutations queryset.
-                permutation.rank = i
-                permutation.comparison_value = value
-                permutation.save()
-                i += 1
-
-            previous_value = value
+        save_ranks(solution_space=solution_space,
+                   pks=list(solution_space.permutations.values_list('pk', flat=True)),
+                   rank_values=np.asarray(rank_values, dtype=float))
 
     except Exception as e:
         logger.error("Could not rank the given permutation attributes of solution space '{0}'."
                      .format(str(solution_space.pk)), exc_info=True)
+
+
+def get_values(solution_space: solution_models.SolutionSpace) -> tuple:
+    """
+    Load the price, time and co2 of all permutations of the solution space with one query.
+
+    :return: Tuple containing the list of the primary keys of the permutations and
+    the array with one row per permutation and one column per criterion (price, time and co2).
+    """
+    rows = list(solution_space.permutations.values_list('pk', *CRITERIA))
+    values = np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), len(CRITERIA))
+    return [row[0] for row in rows], values
+
+
+def get_bounds(solution_space: solution_models.SolutionSpace):
+    """
+    Get the bounds of the criteria used for the normalization.
+
+    :return: List containing the [minimum, maximum] of each criterion, if not all permutations are saved.
+    Otherwise None, so the minimum and maximum of the saved permutations are used.
+    """
+    if solution_space.bounds:
+        return [solution_space.bounds[criterion] for criterion in CRITERIA]
+    return None
+
+
+def save_ranks(solution_space: solution_models.SolutionSpace, pks: list, rank_values: np.ndarray):
+    """
+    Save the ranks and comparison values of the permutations with one bulk update (see get_ranks).
+
+    :param solution_space: The solution space.
+    :param pks: List of the primary keys of the permutations.
+    :param rank_values: Array of the comparison values of the permutations. The greater, the better.
+    """
+    ranks = get_ranks(rank_values)
+    permutations = [solution_models.Permutation(pk=pk,
+                                                rank=int(permutation_rank),
+                                                comparison_value=round(float(rank_value), 3))
+                    for pk, permutation_rank, rank_value in zip(pks, ranks, rank_values)]
+    solution_models.Permutation.objects.bulk_update(permutations, ['rank', 'comparison_value'], batch_size=1000)
+
+
+def normalize_values(values: np.ndarray,
+                     bounds: list = None,
+                     max_best: bool = False) -> np.ndarray:
+    """
+    Calculate the normalized values of all permutations and criteria at once using the Min-Max-Normalization.
+    1 is "best" and 0 is "worst". If min == max, then the criterion has no influence (all values are 0).
+
+    :param values: Array with one row per permutation and one column per criterion.
+    :param bounds: Optional list containing the [minimum, maximum] of each criterion.
+    Default: The minimum and maximum of the given values.
+    :param max_best: Is the maximum the best value?
+    :return: Array of the normalized values.
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return np.zeros(values.shape, dtype=float)
+    if bounds is None:
+        min_values = values.min(axis=0)
+        max_values = values.max(axis=0)
+    else:
+        min_values = np.array([bound[0] for bound in bounds], dtype=float)
+        max_values = np.array([bound[1] for bound in bounds], dtype=float)
+
+    has_influence = min_values != max_values
+    # Use a range of 1 for the criteria without influence, so there is no division by zero.
+    if max_best:
+        normalized_values = (values - min_values) / np.where(has_influence, max_values - min_values, 1)
+    else:
+        normalized_values = (values - max_values) / np.where(has_influence, min_values - max_values, 1)
+    return np.where(has_influence, np.abs(normalized_values), 0)
+
+
+def get_weights(normalized_values: np.ndarray) -> np.ndarray:
+    """
+    Calculate the objective weights of the criteria using the CRITIC method.
+    The amount of information of a criterion is its standard deviation multiplied with
+    the sum of (1 - the correlation coefficient) with the other criteria.
+
+    A criterion with the same value in every permutation (standard deviation 0) contains no information,
+    so its weight is 0. Its correlation coefficients are not defined (NaN) and are treated as 0.
+
+    :param normalized_values: Array with one row per permutation and one column per criterion.
+    :return: Array of the weights of the criteria. All weights are 0, if no criterion contains information.
+    """
+    stdev_values = np.std(normalized_values, axis=0, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_matrix = np.corrcoef(normalized_values, rowvar=False)
+    r_matrix = np.nan_to_num(np.atleast_2d(r_matrix), nan=0.0)
+    # Remove the diagonal from the correlation matrix.
+    off_diagonal = ~np.eye(r_matrix.shape[0], dtype=bool)
+    c_values = np.where(stdev_values > 0, stdev_values, 0) * np.where(off_diagonal, 1 - r_matrix, 0).sum(axis=1)
+    if c_values.sum() == 0:
+        return np.zeros(len(c_values), dtype=float)
+    return c_values / c_values.sum()
+
+
+def get_ranks(rank_values: np.ndarray) -> np.ndarray:
+    """
+    Calculate the ranks in accordance to the given values (see rank).
+    The greater the rank_value, the better is the permutation. Permutations with the same value have the same rank.
+
+    :param rank_values: Array of the comparison values.
+    :return: Array of the ranks.
+    """
+    distinct_values = np.unique(rank_values)
+    return len(distinct_values) - np.searchsorted(distinct_values, rank_values)
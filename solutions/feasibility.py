@@ -0,0 +1,177 @@
+"""
+Implementation of a vectorized matching engine using a dense feasibility matrix.
+
+All abilities are loaded into a (resource skill x ability slot) matrix with NaN for missing values.
+A requirement gets as many ability slots (columns) as the maximum number of abilities
+a single resource skill has for this requirement.
+The constraints of a part process step are then evaluated as vector comparisons and
+reduced to a boolean feasibility vector.
+"""
+import bisect
+import logging
+
+from core import models as core_models
+from solutions import matching
+
+# Third party packages.
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FeasibilityMatcher:
+    """
+    Matching engine, which evaluates the constraints of a part process step on a dense feasibility matrix.
+    """
+
+    def __init__(self, capability_index: matching.CapabilityIndex):
+        self.resource_skills = []
+        """List of all resource skills. The index of a resource skill is the row in the matrix."""
+        process_step_codes = []
+        """The code of the process step each resource skill can perform."""
+        self.process_step_codes = {}
+        """Dictionary containing the process step ids as keys and their codes as values."""
+
+        for process_step_id, resource_skills in capability_index.resource_skills.items():
+            code = len(self.process_step_codes)
+            self.process_step_codes[process_step_id] = code
+            self.resource_skills.extend(resource_skills)
+            process_step_codes.extend([code] * len(resource_skills))
+        self.process_steps = np.array(process_step_codes, dtype=np.int64)
+
+        # Collect the ability values per requirement.
+        ability_values = [capability_index.get_abilities(resource_skill.id)
+                          for resource_skill in self.resource_skills]
+        slots = {}
+        """Dictionary containing the requirement ids as keys and the number of ability slots as values."""
+        self.vocabularies = {}
+        """Dictionary containing the requirement ids of 'str' requirements as keys and 
+        the sorted lists of all their ability values as values. The values are encoded by their position."""
+        for abilities in ability_values:
+            for requirement_id, values in abilities.items():
+                slots[requirement_id] = max(slots.get(requirement_id, 0), len(values))
+                if isinstance(values[0], str):
+                    self.vocabularies.setdefault(requirement_id, set()).update(values)
+        for requirement_id, vocabulary in self.vocabularies.items():
+            self.vocabularies[requirement_id] = sorted(vocabulary)
+
+        self.columns = {}
+        """Dictionary containing the requirement ids as keys and the slices of their columns as values."""
+        width = 0
+        for requirement_id, slot_count in slots.items():
+            self.columns[requirement_id] = slice(width, width + slot_count)
+            width += slot_count
+
+        self.matrix = np.full((len(self.resource_skills), width), np.nan)
+        """The feasibility matrix containing the numeric (or encoded) ability values."""
+        for row, abilities in enumerate(ability_values):
+            for requirement_id, values in abilities.items():
+                start = self.columns[requirement_id].start
+                if requirement_id in self.vocabularies:
+                    vocabulary = self.vocabularies[requirement_id]
+                    values = [bisect.bisect_left(vocabulary, value) for value in values]
+                self.matrix[row, start:start + len(values)] = values
+
+    def evaluate(self, constraint: matching.CompiledConstraint) -> np.ndarray:
+        """
+        Evaluate a constraint for all resource skills.
+
+        :param constraint: The compiled constraint.
+        return: Boolean vector, which is True for each resource skill with an ability fulfilling the constraint.
+        """
+        if constraint.compare is None or constraint.requirement_id not in self.columns:
+            return np.zeros(len(self.resource_skills), dtype=bool)
+        values = self.matrix[:, self.columns[constraint.requirement_id]]
+        present = ~np.isnan(values)
+
+        operator_name = constraint.operator
+        if constraint.requirement_id in self.vocabularies:
+            # Compare the position of the constraint value in the sorted vocabulary with the encoded values.
+            vocabulary = self.vocabularies[constraint.requirement_id]
+            left = bisect.bisect_left(vocabulary, constraint.value)
+            right = bisect.bisect_right(vocabulary, constraint.value)
+            if operator_name == '=':
+                fulfilled = (values == left) if left < right else np.zeros(values.shape, dtype=bool)
+            elif operator_name == '!=':
+                fulfilled = (values != left) if left < right else np.ones(values.shape, dtype=bool)
+            elif operator_name == '<':
+                fulfilled = values < left
+            elif operator_name == '<=':
+                fulfilled = values < right
+            elif operator_name == '>':
+                fulfilled = values >= right
+            else:
+                fulfilled = values >= left
+        else:
+            fulfilled = constraint.compare(values, float(constraint.value))
+
+        # Missing abilities never fulfill a constraint.
+        return np.any(fulfilled & present, axis=1)
+
+    def has_ability(self, requirement_id) -> np.ndarray:
+        """
+        Check for all resource skills, if they have an ability for the requirement.
+
+        :param requirement_id: The id of the requirement.
+        return: Boolean vector, which is True for each resource skill with an ability for the requirement.
+        """
+        if requirement_id not in self.columns:
+            return np.zeros(len(self.resource_skills), dtype=bool)
+        return np.any(~np.isnan(self.matrix[:, self.columns[requirement_id]]), axis=1)
+
+    def match(self, part_process_step: core_models.PartProcessStep) -> list:
+        """
+        Find the resource skills, which can perform the process step of the part process step
+        and fulfill all its constraints.
+
+        :param part_process_step: The part process step.
+        return: List of resource skills.
+        """
+        return self.match_constraints(part_process_step.process_step_id,
+                                      matching.compile_constraints(part_process_step))
+
+    def match_constraints(self, process_step_id, compiled_constraints: list) -> list:
+        """
+        Find the resource skills, which can perform the process step and fulfill all compiled constraints.
+        Only the feasibility matrix is used, so no database access is required.
+
+        Constraints, which are not optional, are reduced with 'all'.
+        Optional constraints based on the same requirement are alternatives and are reduced with 'any'.
+
+        :param process_step_id: The id of the process step.
+        :param compiled_constraints: List of compiled constraints of one part process step.
+        return: List of resource skills.
+        """
+        code = self.process_step_codes.get(process_step_id)
+        if code is None:
+            return []
+        feasible = self.process_steps == code
+
+        mandatory_constraints, optional_groups = matching.group_constraints(compiled_constraints)
+        for constraint in mandatory_constraints:
+            feasible &= self.evaluate(constraint)
+        for constraints in optional_groups.values():
+            feasible &= np.any([self.evaluate(constraint) for constraint in constraints], axis=0)
+
+        return [self.resource_skills[row] for row in np.flatnonzero(feasible)]
+
+    def diagnose(self, part_process_step: core_models.PartProcessStep) -> dict:
+        """
+        Count for the part process step, how many resource skills were considered and
+        how many were rejected by each constraint (and each optional group) or had no ability for its requirement.
+        A resource skill without an ability for the requirement is only counted as missing ability.
+
+        :param part_process_step: The part process step.
+        return: The diagnostics (see matching.get_diagnostics).
+        """
+        code = self.process_step_codes.get(part_process_step.process_step_id)
+        considered = self.process_steps == code
+
+        def count(constraints):
+            fulfilled = np.any([self.evaluate(constraint) for constraint in constraints], axis=0)
+            with_ability = considered & self.has_ability(constraints[0].requirement_id)
+            return np.count_nonzero(with_ability & ~fulfilled), np.count_nonzero(considered & ~with_ability)
+
+        mandatory_constraints, optional_groups = matching.group_constraints(
+            matching.compile_constraints(part_process_step))
+        return matching.get_diagnostics(np.count_nonzero(considered), mandatory_constraints, optional_groups, count)
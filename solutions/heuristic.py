@@ -0,0 +1,216 @@
+"""
+Implementation of a heuristic search of the Pareto front of solution spaces, which are too large to enumerate.
+
+The permutations of a cost table are searched with an evolutionary algorithm (NSGA-II). An individual is a
+permutation represented by its choices (the index of the chosen resource skill of each part process step).
+Price, time and CO2 are minimized directly. The population is evolved with binary tournaments,
+uniform crossover and random mutation of the choices. The next population is selected by the non-dominated
+sorting and the crowding distance of the parents and the offspring. Each generation is evaluated at once
+with the cost table. All non-dominated permutations found are kept in an archive (the approximate Pareto front).
+
+The search is deterministic for the same seed.
+
+Source: K. Deb, A. Pratap, S. Agarwal, and T. Meyarivan:
+        „A fast and elitist multiobjective genetic algorithm: NSGA-II“,
+        IEEE Trans. Evol. Comput., Bd. 6, Nr. 2, S. 182–197, 2002.
+"""
+import numpy as np
+
+from solutions import costing
+
+
+def get_dominance(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Check, which points dominate which other points. All criteria are minimized.
+
+    :param first: Array with one row per point and one column per criterion.
+    :param second: Array with one row per point and one column per criterion.
+    return: Matrix, which is True, if the point of the first array (row) dominates the point of the second array
+    (column).
+    """
+    return (np.all(first[:, np.newaxis, :] <= second[np.newaxis, :, :], axis=2) &
+            np.any(first[:, np.newaxis, :] < second[np.newaxis, :, :], axis=2))
+
+
+def get_fronts(values: np.ndarray) -> np.ndarray:
+    """
+    Sort the points into fronts (non-dominated sorting). The first front (0) contains the non-dominated points,
+    the second front the points, which are only dominated by points of the first front, and so on.
+
+    :param values: Array with one row per point and one column per criterion. All criteria are minimized.
+    return: Array of the front of each point.
+    """
+    dominates = get_dominance(values, values)
+    dominated_by = dominates.sum(axis=0)
+    """The number of the remaining points dominating each point."""
+    fronts = np.full(len(values), -1, dtype=np.int64)
+    remaining = np.ones(len(values), dtype=bool)
+    front = 0
+    while remaining.any():
+        current = remaining & (dominated_by == 0)
+        fronts[current] = front
+        remaining &= ~current
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        front += 1
+    return fronts
+
+
+def get_crowding_distances(values: np.ndarray, fronts: np.ndarray) -> np.ndarray:
+    """
+    Calculate the crowding distance of each point within its front: The sum of the normalized distances
+    between its neighbours in each criterion. The boundary points of a front have an infinite distance.
+
+    :param values: Array with one row per point and one column per criterion.
+    :param fronts: Array of the front of each point.
+    return: Array of the crowding distances.
+    """
+    distances = np.zeros(len(values), dtype=float)
+    for front in np.unique(fronts):
+        members = np.flatnonzero(fronts == front)
+        for criterion in range(values.shape[1]):
+            order = members[np.argsort(values[members, criterion], kind='stable')]
+            distances[order[0]] = distances[order[-1]] = np.inf
+            span = values[order[-1], criterion] - values[order[0], criterion]
+            if span > 0 and len(order) > 2:
+                distances[order[1:-1]] += (values[order[2:], criterion] - values[order[:-2], criterion]) / span
+    return distances
+
+
+def get_values(cost_table: costing.CostTable, choices: np.ndarray) -> np.ndarray:
+    """
+    Calculate the price, time and co2 of the permutations.
+
+    return: Array with one row per permutation and one column per criterion.
+    """
+    totals = cost_table.get_totals(choices)
+    return np.column_stack([totals[criterion] for criterion in costing.CRITERIA])
+
+
+def get_non_dominated(choices: np.ndarray, values: np.ndarray):
+    """
+    Remove the duplicated and the dominated permutations.
+
+    return: Tuple containing the choices and the values of the remaining permutations.
+    """
+    choices, index = np.unique(choices, axis=0, return_index=True)
+    values = values[index]
+    non_dominated = costing.get_non_dominated(values)
+    return choices[non_dominated], values[non_dominated]
+
+
+def update_archive(archive_choices: np.ndarray, archive_values: np.ndarray, choices: np.ndarray, values: np.ndarray):
+    """
+    Add the new permutations, which are not dominated, to the archive of non-dominated permutations and
+    remove the permutations of the archive, which are dominated by them.
+
+    return: Tuple containing the choices and the values of the archive.
+    """
+    choices, values = get_non_dominated(choices, values)
+    known = np.all(choices[:, np.newaxis, :] == archive_choices[np.newaxis, :, :], axis=2).any(axis=1)
+    new = ~known & ~get_dominance(archive_values, values).any(axis=0)
+    choices, values = choices[new], values[new]
+    remaining = ~get_dominance(values, archive_values).any(axis=0)
+    return (np.concatenate([archive_choices[remaining], choices]),
+            np.concatenate([archive_values[remaining], values]))
+
+
+def search_front(cost_table: costing.CostTable, budget: int, population_size: int, generator, callback=None):
+    """
+    Search the Pareto front of the permutations of a cost table with NSGA-II.
+
+    :param cost_table: The cost table.
+    :param budget: The number of permutations, which are evaluated.
+    :param population_size: The number of permutations of a generation.
+    :param generator: The random number generator.
+    :param callback: Optional callable without arguments, which is called after each generation.
+    return: Tuple containing the choices and the values of the non-dominated permutations found.
+    """
+    shape = np.array(cost_table.shape, dtype=np.int64)
+    mutation_rate = 1 / len(shape)
+    """Each choice is mutated with this probability, so one choice per permutation is mutated on average."""
+
+    population = generator.integers(0, shape, size=(min(population_size, budget), len(shape)))
+    values = get_values(cost_table, population)
+    evaluations = len(population)
+    archive_choices, archive_values = get_non_dominated(population, values)
+    fronts = get_fronts(values)
+    distances = get_crowding_distances(values, fronts)
+
+    while evaluations < budget:
+        count = min(population_size, budget - evaluations)
+
+        # Select the parents with binary tournaments: The permutation of the better front wins.
+        # Within the same front, the permutation in the less crowded region wins.
+        first, second = generator.integers(0, len(population), size=(2, 2 * count))
+        wins = (fronts[first] < fronts[second]) | ((fronts[first] == fronts[second]) &
+                                                   (distances[first] > distances[second]))
+        parents = np.where(wins, first, second)
+
+        # Create the offspring with uniform crossover and mutation.
+        crossover = generator.random((count, len(shape))) < 0.5
+        offspring = np.where(crossover, population[parents[:count]], population[parents[count:]])
+        mutation = generator.random((count, len(shape))) < mutation_rate
+        offspring = np.where(mutation, generator.integers(0, shape, size=(count, len(shape))), offspring)
+        offspring_values = get_values(cost_table, offspring)
+        evaluations += count
+
+        archive_choices, archive_values = update_archive(archive_choices, archive_values, offspring, offspring_values)
+
+        # Select the next population from the parents and the offspring (elitism).
+        choices, index = np.unique(np.concatenate([population, offspring]), axis=0, return_index=True)
+        values = np.concatenate([values, offspring_values])[index]
+        fronts = get_fronts(values)
+        distances = get_crowding_distances(values, fronts)
+        selected = np.lexsort((-distances, fronts))[:population_size]
+        population, values, fronts, distances = choices[selected], values[selected], fronts[selected], \
+            distances[selected]
+        if callback is not None:
+            callback()
+
+    order = np.lexsort(archive_choices.T[::-1])
+    return archive_choices[order], archive_values[order]
+
+
+def search(cost_tables: list, budget: int, population_size: int, seed: int, callback=None) -> list:
+    """
+    Search the approximate Pareto front of the permutations of the cost tables.
+
+    The resource skills, which are dominated within their part process step, are removed first
+    (see CostTable.get_pruned). The budget is split equally between the cost tables. A cost table with less
+    permutations than its budget is enumerated, otherwise its front is searched with NSGA-II.
+    Finally, the permutations dominated by permutations of other cost tables are removed.
+
+    :param cost_tables: List of cost tables.
+    :param budget: The number of permutations, which are evaluated.
+    :param population_size: The number of permutations of a generation.
+    :param seed: The seed of the random number generator.
+    :param callback: Optional callable without arguments, which is called after each generation
+    (e.g. to mark the search as running).
+    return: List of tuples containing the (pruned) cost table and the choices of its permutations of the front.
+    """
+    generator = np.random.default_rng(seed)
+    table_budget = max(budget // max(len(cost_tables), 1), 1)
+    cost_tables = [cost_table.get_pruned() for cost_table in cost_tables]
+
+    fronts = []
+    """List containing the choices and the values of the front of each cost table."""
+    for cost_table in cost_tables:
+        if cost_table.size <= table_budget:
+            choices = cost_table.get_choices(np.arange(cost_table.size, dtype=np.int64))
+            fronts.append(get_non_dominated(choices, get_values(cost_table, choices)))
+        else:
+            fronts.append(search_front(cost_table, table_budget, population_size, generator, callback))
+
+    if not fronts:
+        return []
+
+    # Remove the permutations, which are dominated by the front of another cost table.
+    non_dominated = costing.get_non_dominated(np.concatenate([values for choices, values in fronts]))
+    front = []
+    start = 0
+    for cost_table, (choices, values) in zip(cost_tables, fronts):
+        table_non_dominated = non_dominated[start:start + len(choices)]
+        start += len(choices)
+        if table_non_dominated.any():
+            front.append((cost_table, choices[table_non_dominated]))
+    return front
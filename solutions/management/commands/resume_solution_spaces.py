@@ -0,0 +1,44 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from solutions import models as solutions_models
+from solutions import search_solution
+
+
+class Command(BaseCommand):
+    help = "Resume the interrupted searches of solution spaces (status pending, matching, costing or evaluating). " \
+           "The committed permutations are not calculated again."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes',
+                            type=int,
+                            default=10,
+                            help="Only resume the solution spaces, which were not updated for the given minutes "
+                                 "(so running searches are not resumed). A running search updates its solution space "
+                                 "with each chunk of permutations and every minute while searching a Pareto front.")
+        parser.add_argument('--failed',
+                            action='store_true',
+                            help="Also resume the failed searches.")
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'matching', 'costing', 'evaluating']
+        if options['failed']:
+            statuses.append('failed')
+        solution_spaces = solutions_models.SolutionSpace.objects.filter(
+            status__in=statuses,
+            updated_at__lt=timezone.now() - datetime.timedelta(minutes=options['minutes'])).order_by('created_at')
+
+        for solution_space in solution_spaces:
+            # Claim the solution space: Only one process can update the unchanged solution space.
+            # A running search changes it with each chunk or heartbeat (see search_solution.Heartbeat).
+            if not solutions_models.SolutionSpace.objects.filter(
+                    pk=solution_space.pk, updated_at=solution_space.updated_at).update(updated_at=timezone.now()):
+                self.stdout.write("Solution space '{0}' is already running.".format(str(solution_space)))
+                continue
+            self.stdout.write("Resuming solution space '{0}' ({1}, {2}/{3} permutations)."
+                              .format(str(solution_space), solution_space.status,
+                                      solution_space.processed_permutations, solution_space.total_permutations))
+            search_solution.resume_solution_space(solution_space)
+            self.stdout.write("Solution space '{0}': {1}.".format(str(solution_space), solution_space.status))
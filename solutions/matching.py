@@ -0,0 +1,387 @@
+"""
+Implementation of helper functions for matching the constraints of part process steps
+with the abilities of resource skills.
+"""
+import operator
+import logging
+import bisect
+
+from django.db.models import Prefetch
+
+from core import models as core_models
+
+logger = logging.getLogger(__name__)
+
+TYPES = {
+    'int': int,
+    'float': float,
+    'str': str,
+    'bool': bool
+}
+
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge
+}
+
+ORDERING = ('resource', 'pk')
+"""The order of the candidate resource skills of all matching engines (the default ordering with the id as
+tie-breaker), so the permutations, their cursor and the ties of the ranking do not depend on the engine."""
+
+
+class CompiledConstraint:
+    """
+    A constraint compiled to a typed predicate.
+
+    The constraint value is converted to the data type of the requirement and the operator is resolved once,
+    so checking the abilities of a resource skill only requires cheap comparisons.
+    """
+    __slots__ = ('id', 'requirement_id', 'requirement_name', 'optional', 'operator', 'value', 'compare')
+
+    def __init__(self, constraint: core_models.Constraint):
+        self.id = constraint.id
+        self.requirement_id = constraint.requirement_id
+        self.requirement_name = constraint.requirement.name
+        self.optional = constraint.optional
+        self.operator = constraint.operator
+        # Conversion is possible, already checked at model level.
+        self.value = TYPES[constraint.requirement.data_type](constraint.value)
+        self.compare = OPERATORS.get(constraint.operator)
+        if self.compare is None:
+            # Operator does not exist.
+            # This should never happen, since the operators are fixed.
+            logger.error("Could not find a matching operator for given operator '{0}' of constraint '{1}'."
+                         .format(str(constraint.operator), str(constraint)))
+
+    def select(self, capability_index) -> set:
+        """
+        Get all resource skills with an ability, which fulfills this constraint.
+
+        :param capability_index: The capability index containing the ability indexes of the requirements.
+        return: Set of resource skill ids.
+        """
+        if self.compare is None:
+            return set()
+        ability_index = capability_index.get_ability_index(self.requirement_id)
+        if ability_index is None:
+            return set()
+        return ability_index.select(self.operator, self.value)
+
+
+def compile_constraints(part_process_step: core_models.PartProcessStep) -> list:
+    """
+    Compile all constraints of a part process step.
+
+    :param part_process_step: The part process step.
+    return: List of compiled constraints.
+    """
+    return [CompiledConstraint(constraint)
+            for constraint in part_process_step.Constraint.all().select_related('requirement')]
+
+
+def group_constraints(compiled_constraints: list) -> tuple:
+    """
+    Group the compiled constraints of a part process step into mandatory constraints and optional groups.
+
+    Optional constraints based on the same requirement are alternatives (e.g. material can be plastic OR metal),
+    of which at least one has to be fulfilled. If only one constraint of a requirement is optional,
+    it is handled like a mandatory constraint.
+
+    :param compiled_constraints: List of compiled constraints of one part process step.
+    return: Tuple of the list of mandatory constraints and a dictionary containing the requirement ids as keys
+    and the lists of alternative optional constraints as values.
+    """
+    mandatory_constraints = []
+    optional_groups = {}
+    for constraint in compiled_constraints:
+        if constraint.optional:
+            optional_groups.setdefault(constraint.requirement_id, []).append(constraint)
+        else:
+            mandatory_constraints.append(constraint)
+    return mandatory_constraints, optional_groups
+
+
+def get_diagnostics(considered: int, mandatory_constraints: list, optional_groups: dict, count) -> dict:
+    """
+    Create the diagnostics of matching one part process step from aggregated counters.
+
+    :param considered: The number of resource skills, which can perform the process step.
+    :param mandatory_constraints: List of mandatory compiled constraints.
+    :param optional_groups: Dictionary containing the requirement ids as keys and
+    the lists of alternative optional compiled constraints as values.
+    :param count: Callable, which gets a list of alternative compiled constraints and returns the tuple
+    (number of rejected resource skills, number of resource skills without an ability for the requirement).
+    return: The diagnostics.
+    Example:
+
+    {
+     'considered': 12,
+     'constraints': [{'constraint': '...', 'requirement': 'length', 'operator': '>=', 'value': '400',
+                      'optional': False, 'rejected': 5, 'missing_ability': 2}],
+     'optional_groups': [{'requirement': 'material', 'rejected': 3, 'missing_ability': 1}]
+    }
+    """
+    diagnostics = {'considered': int(considered), 'constraints': [], 'optional_groups': []}
+    optional_constraints = [constraint for constraints in optional_groups.values() for constraint in constraints]
+    for constraint in mandatory_constraints + optional_constraints:
+        rejected, missing_ability = count([constraint])
+        diagnostics['constraints'].append({'constraint': str(constraint.id),
+                                           'requirement': constraint.requirement_name,
+                                           'operator': constraint.operator,
+                                           'value': str(constraint.value),
+                                           'optional': constraint.optional,
+                                           'rejected': int(rejected),
+                                           'missing_ability': int(missing_ability)})
+    for constraints in optional_groups.values():
+        rejected, missing_ability = count(constraints)
+        diagnostics['optional_groups'].append({'requirement': constraints[0].requirement_name,
+                                               'rejected': int(rejected),
+                                               'missing_ability': int(missing_ability)})
+    return diagnostics
+
+
+class AbilityIndex:
+    """
+    Index of the typed ability values of one requirement.
+
+    The values are kept in a sorted array together with the ids of the according resource skills,
+    so range constraints (<, >, <=, >=) are answered by bisection.
+    For 'str' and 'bool' requirements, the equality operators (=, !=) are answered by a hash index.
+    """
+
+    def __init__(self, data_type: str):
+        self.hashed = data_type in ('str', 'bool')
+        """Are the equality operators answered by the hash index."""
+        self.values = []
+        """Sorted list of the typed ability values."""
+        self.resource_skill_ids = []
+        """The resource skill ids in the same order as the values."""
+        self.resource_skill_ids_by_value = {}
+        """Dictionary containing the typed ability values as keys and sets of resource skill ids as values."""
+        self._pairs = []
+
+    def add(self, value, resource_skill_id):
+        """
+        Add a typed ability value of a resource skill. The index has to be built afterwards.
+        """
+        self._pairs.append((value, resource_skill_id))
+        self.resource_skill_ids_by_value.setdefault(value, set()).add(resource_skill_id)
+
+    def build(self):
+        """
+        Sort the added ability values.
+        """
+        self._pairs.sort(key=operator.itemgetter(0))
+        self.values = [value for value, _ in self._pairs]
+        self.resource_skill_ids = [resource_skill_id for _, resource_skill_id in self._pairs]
+        self._pairs = []
+
+    def select(self, operator_name: str, value) -> set:
+        """
+        Get all resource skills with at least one ability value, which satisfies the given operator and value.
+
+        :param operator_name: The operator of the constraint.
+        :param value: The typed value of the constraint.
+        return: Set of resource skill ids.
+        """
+        if self.hashed and operator_name == '=':
+            return set(self.resource_skill_ids_by_value.get(value, ()))
+        if self.hashed and operator_name == '!=':
+            selected = set()
+            for ability_value, resource_skill_ids in self.resource_skill_ids_by_value.items():
+                if ability_value != value:
+                    selected.update(resource_skill_ids)
+            return selected
+
+        left = bisect.bisect_left(self.values, value)
+        right = bisect.bisect_right(self.values, value)
+        if operator_name == '=':
+            return set(self.resource_skill_ids[left:right])
+        elif operator_name == '!=':
+            return set(self.resource_skill_ids[:left]) | set(self.resource_skill_ids[right:])
+        elif operator_name == '<':
+            return set(self.resource_skill_ids[:left])
+        elif operator_name == '<=':
+            return set(self.resource_skill_ids[:right])
+        elif operator_name == '>':
+            return set(self.resource_skill_ids[right:])
+        elif operator_name == '>=':
+            return set(self.resource_skill_ids[left:])
+        return set()
+
+
+class CapabilityIndex:
+    """
+    In-memory index of all resource skills keyed by the process step they can perform.
+
+    The index is built with a handful of queries and can be reused for all part process steps
+    of all manufacturing possibilities of a part.
+    """
+
+    def __init__(self):
+        self.resource_skills = {}
+        """
+        Dictionary containing the process step ids as keys and
+        as values lists with the resource skills, which can perform the process step.
+        Example:
+
+        {
+         process_step1: [resource_skill1, resource_skill2]
+        }
+        """
+        self.ability_values = {}
+        """
+        Dictionary containing the resource skill ids as keys and as values dictionaries
+        with the requirement ids as keys and the lists of typed ability values as values.
+        Example:
+
+        {
+         resource_skill1: {requirement1: [400, 600], requirement2: ['metal']}
+        }
+        """
+        self.ability_indexes = {}
+        """Dictionary containing the requirement ids as keys and the according ability indexes as values."""
+
+    @classmethod
+    def load(cls):
+        """
+        Load all resource skills with their skills and abilities and parse the ability values once.
+
+        return: The capability index.
+        """
+        index = cls()
+        resource_skills = core_models.ResourceSkill.objects.order_by(*ORDERING).select_related(
+            'skill', 'resource').prefetch_related(
+            Prefetch('Ability', queryset=core_models.Ability.objects.all().select_related('requirement')))
+        for resource_skill in resource_skills:
+            index.resource_skills.setdefault(resource_skill.skill.process_step_id, []).append(resource_skill)
+            abilities = index.ability_values.setdefault(resource_skill.id, {})
+            for ability in resource_skill.Ability.all():
+                # Conversion is possible, already checked at model level.
+                value = TYPES[ability.requirement.data_type](ability.value)
+                abilities.setdefault(ability.requirement_id, []).append(value)
+                if ability.requirement_id not in index.ability_indexes:
+                    index.ability_indexes[ability.requirement_id] = AbilityIndex(ability.requirement.data_type)
+                index.ability_indexes[ability.requirement_id].add(value, resource_skill.id)
+        for ability_index in index.ability_indexes.values():
+            ability_index.build()
+        return index
+
+    def get_resource_skills(self, process_step_id) -> list:
+        """
+        Get all resource skills, which can perform the given process step.
+
+        :param process_step_id: The id of the process step.
+        return: List of resource skills.
+        """
+        return self.resource_skills.get(process_step_id, [])
+
+    def get_abilities(self, resource_skill_id) -> dict:
+        """
+        Get the typed ability values of a resource skill.
+
+        :param resource_skill_id: The id of the resource skill.
+        return: Dictionary containing the requirement ids as keys and the lists of typed ability values as values.
+        """
+        return self.ability_values.get(resource_skill_id, {})
+
+    def get_ability_index(self, requirement_id):
+        """
+        Get the ability index of a requirement.
+
+        :param requirement_id: The id of the requirement.
+        return: The ability index or None, if no resource skill has an ability for this requirement.
+        """
+        return self.ability_indexes.get(requirement_id)
+
+
+class IndexMatcher:
+    """
+    Matching engine, which looks up the resource skills fulfilling the constraints in the ability indexes.
+    """
+
+    def __init__(self, capability_index: CapabilityIndex):
+        self.capability_index = capability_index
+
+    def match(self, part_process_step: core_models.PartProcessStep) -> list:
+        """
+        Find the resource skills, which can perform the process step of the part process step
+        and fulfill all its constraints.
+
+        :param part_process_step: The part process step.
+        return: List of resource skills.
+        """
+        return self.match_constraints(part_process_step.process_step_id, compile_constraints(part_process_step))
+
+    def match_constraints(self, process_step_id, compiled_constraints: list) -> list:
+        """
+        Find the resource skills, which can perform the process step and fulfill all compiled constraints.
+        Only the capability index is used, so no database access is required.
+
+        :param process_step_id: The id of the process step.
+        :param compiled_constraints: List of compiled constraints of one part process step.
+        return: List of resource skills.
+        """
+        capability_index = self.capability_index
+        resources_temp = []
+        """
+        List temporarily containing the resource skills, 
+        which fulfill all constraints of a part process step.
+        """
+
+        # Compile the constraints of the part_process_step to typed predicates and group them
+        # into mandatory constraints and optional groups before visiting the resource skills.
+        mandatory_constraints, optional_groups = group_constraints(compiled_constraints)
+
+        # Look up the resource skills, which fulfill the mandatory constraints, in the ability indexes
+        # and intersect them. Each optional group is fulfilled by the union of its alternatives.
+        candidates = None
+        """Set of resource skill ids, which fulfill all constraints. None, if there are no constraints."""
+        for constraint in mandatory_constraints:
+            fulfilling = constraint.select(capability_index)
+            candidates = fulfilling if candidates is None else candidates & fulfilling
+            if not candidates:
+                return resources_temp
+        for constraints in optional_groups.values():
+            fulfilling = set()
+            for constraint in constraints:
+                fulfilling |= constraint.select(capability_index)
+            candidates = fulfilling if candidates is None else candidates & fulfilling
+            if not candidates:
+                return resources_temp
+
+        # Only get the resource skills, which can perform the process_step of the part_process_step.
+        for resource_skill in capability_index.get_resource_skills(process_step_id):
+            # Save this resource if the constraints are fulfilled.
+            if candidates is None or resource_skill.id in candidates:
+                resources_temp.append(resource_skill)
+
+        return resources_temp
+
+    def diagnose(self, part_process_step: core_models.PartProcessStep) -> dict:
+        """
+        Count for the part process step, how many resource skills were considered and
+        how many were rejected by each constraint (and each optional group) or had no ability for its requirement.
+        A resource skill without an ability for the requirement is only counted as missing ability.
+
+        :param part_process_step: The part process step.
+        return: The diagnostics (see get_diagnostics).
+        """
+        capability_index = self.capability_index
+        considered = {resource_skill.id for resource_skill in
+                      capability_index.get_resource_skills(part_process_step.process_step_id)}
+
+        def count(constraints):
+            fulfilling = set()
+            for constraint in constraints:
+                fulfilling |= constraint.select(capability_index)
+            ability_index = capability_index.get_ability_index(constraints[0].requirement_id)
+            with_ability = considered.intersection(ability_index.resource_skill_ids if ability_index else ())
+            return len(with_ability - fulfilling), len(considered - with_ability)
+
+        mandatory_constraints, optional_groups = group_constraints(compile_constraints(part_process_step))
+        return get_diagnostics(len(considered), mandatory_constraints, optional_groups, count)
@@ -0,0 +1,252 @@
+"""
+Implementation of a cache for the results of matching part process steps with resource skills.
+
+Part process steps with the same process step and the same constraints (requirements, operators and values)
+are matched by the same resource skills, as long as the catalog (resources, resource skills, skills,
+abilities and requirements) does not change. Therefore, the ids of the matching resource skills are cached
+with a fingerprint of the part process step and a catalog version, which is increased on every catalog change.
+
+The cache has a bounded in-process LRU tier (MATCHING_CACHE_SIZE) and optionally
+a django cache backend tier (MATCHING_CACHE_BACKEND), so several workers can share the results.
+Without a backend, the catalog version is only increased for the changes of the own process,
+so the in-process tier is disabled by default. Catalog changes, which bypass the model signals
+(e.g. QuerySet.update, bulk_create), require a call of bump_catalog_version.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import models as core_models
+from solutions import matching
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'plafosus:matching:'
+CATALOG_VERSION_KEY = KEY_PREFIX + 'catalog_version'
+
+_catalog_version = 0
+"""The catalog version of this process."""
+_lock = threading.Lock()
+
+
+class LRUCache:
+    """
+    Bounded, thread safe in-process cache, which discards the least recently used entries.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LRUCache(getattr(settings, 'MATCHING_CACHE_SIZE',
+                               1024 if getattr(settings, 'MATCHING_CACHE_BACKEND', None) else 0))
+
+
+def get_backend():
+    """
+    Get the django cache backend defined in the settings (MATCHING_CACHE_BACKEND).
+
+    return: The cache backend or None, if no backend is defined.
+    """
+    alias = getattr(settings, 'MATCHING_CACHE_BACKEND', None)
+    return caches[alias] if alias else None
+
+
+def is_enabled() -> bool:
+    """
+    Check if at least one tier of the cache is enabled.
+    """
+    return local_cache.maxsize > 0 or get_backend() is not None
+
+
+def get_catalog_version() -> int:
+    """
+    Get the current catalog version.
+    If a cache backend is defined, the version shared by all workers is used.
+    """
+    backend = get_backend()
+    if backend is not None:
+        try:
+            backend.add(CATALOG_VERSION_KEY, 0, timeout=None)
+            return backend.get(CATALOG_VERSION_KEY, 0)
+        except Exception as e:
+            logger.warning("Could not get the catalog version from the matching cache backend.", exc_info=True)
+    return _catalog_version
+
+
+def bump_catalog_version():
+    """
+    Increase the catalog version, which invalidates all cached matching results.
+    """
+    global _catalog_version
+    with _lock:
+        _catalog_version += 1
+    backend = get_backend()
+    if backend is not None:
+        try:
+            backend.add(CATALOG_VERSION_KEY, 0, timeout=None)
+            backend.incr(CATALOG_VERSION_KEY)
+        except Exception as e:
+            logger.warning("Could not increase the catalog version of the matching cache backend.", exc_info=True)
+
+
+def get_fingerprint(part_process_step: core_models.PartProcessStep) -> str:
+    """
+    Calculate a canonical fingerprint of the process step and the constraints of a part process step.
+    The order of the constraints and the notation of the values (e.g. '400' and '400.0' for float) are irrelevant.
+
+    :param part_process_step: The part process step.
+    return: The fingerprint.
+    """
+    constraints = sorted((str(constraint.requirement_id), constraint.operator,
+                          type(constraint.value).__name__, repr(constraint.value), constraint.optional)
+                         for constraint in matching.compile_constraints(part_process_step))
+    content = repr((str(part_process_step.process_step_id), constraints))
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_cached(key):
+    """
+    Get a cached value (e.g. the list of resource skill ids).
+    First the in-process tier and then the backend tier is asked.
+
+    return: The cached value or None, if the key is not cached.
+    """
+    value = local_cache.get(key)
+    if value is None:
+        backend = get_backend()
+        if backend is not None:
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.warning("Could not get '{0}' from the matching cache backend.".format(key), exc_info=True)
+            if value is not None:
+                local_cache.set(key, value)
+    return value
+
+
+def set_cached(key, value):
+    """
+    Cache the value in all tiers.
+    """
+    local_cache.set(key, value)
+    backend = get_backend()
+    if backend is not None:
+        try:
+            backend.set(key, value)
+        except Exception as e:
+            logger.warning("Could not set '{0}' in the matching cache backend.".format(key), exc_info=True)
+
+
+class CachedMatcher:
+    """
+    Matcher, which returns cached results and only asks the wrapped matcher on a cache miss.
+
+    The wrapped matcher (and its capability index) is only created on the first cache miss.
+    """
+
+    def __init__(self, matcher_factory):
+        """
+        :param matcher_factory: Callable without arguments, which creates the wrapped matcher.
+        """
+        self.matcher_factory = matcher_factory
+        self.matcher = None
+        self.catalog_version = get_catalog_version()
+
+    def get_key(self, part_process_step: core_models.PartProcessStep) -> str:
+        """
+        Get the cache key of a part process step for the catalog version of this matcher.
+        """
+        return '{0}{1}:{2}'.format(KEY_PREFIX, str(self.catalog_version), get_fingerprint(part_process_step))
+
+    def get_matcher(self):
+        """
+        Get the wrapped matcher. It is created on the first call.
+        """
+        if self.matcher is None:
+            self.matcher = self.matcher_factory()
+        return self.matcher
+
+    def match(self, part_process_step: core_models.PartProcessStep) -> list:
+        """
+        Find the resource skills, which can perform the process step of the part process step
+        and fulfill all its constraints.
+
+        :param part_process_step: The part process step.
+        return: List of resource skills.
+        """
+        return self.match_many([part_process_step], lambda matcher, part_process_steps: [
+            matcher.match(part_process_step) for part_process_step in part_process_steps])[0]
+
+    def match_many(self, part_process_steps: list, match_function) -> list:
+        """
+        Find the resource skills for several part process steps.
+        The cache is asked for all part process steps first, only the remaining ones are matched.
+
+        :param part_process_steps: List of part process steps.
+        :param match_function: Callable, which gets the wrapped matcher and the list of not cached
+        part process steps and returns the list of results (in the same order).
+        A result is either the list of resource skills or the exception raised while matching.
+        return: List of results in the order of the part process steps.
+        """
+        keys = [self.get_key(part_process_step) for part_process_step in part_process_steps]
+        cached_resource_skill_ids = [get_cached(key) for key in keys]
+
+        # Load the cached resource skills with one query.
+        resource_skills = core_models.ResourceSkill.objects.select_related('skill', 'resource').in_bulk(
+            [resource_skill_id for resource_skill_ids in cached_resource_skill_ids if resource_skill_ids
+             for resource_skill_id in resource_skill_ids])
+        results = [None if resource_skill_ids is None else
+                   [resource_skills[resource_skill_id] for resource_skill_id in resource_skill_ids
+                    if resource_skill_id in resource_skills]
+                   for resource_skill_ids in cached_resource_skill_ids]
+
+        # Match the part process steps, which are not cached.
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            matched = match_function(self.get_matcher(), [part_process_steps[i] for i in missing])
+            for i, result in zip(missing, matched):
+                if not isinstance(result, Exception):
+                    set_cached(keys[i], [resource_skill.id for resource_skill in result])
+                results[i] = result
+        return results
+
+    def diagnose(self, part_process_step: core_models.PartProcessStep) -> dict:
+        """
+        Get the (cached) diagnostics of matching the part process step from the wrapped matcher.
+
+        :param part_process_step: The part process step.
+        return: The diagnostics (see matching.get_diagnostics).
+        """
+        key = self.get_key(part_process_step) + ':diagnostics'
+        diagnostics = get_cached(key)
+        if diagnostics is None:
+            diagnostics = self.get_matcher().diagnose(part_process_step)
+            set_cached(key, diagnostics)
+        return diagnostics
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0002_auto_20210422_1656'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutionspace',
+            name='diagnostics',
+            field=models.JSONField(blank=True, editable=False, help_text='Diagnostics of matching the part process steps with the resource skills (considered and rejected resource skills per constraint).', null=True),
+        ),
+    ]
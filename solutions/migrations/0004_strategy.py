@@ -0,0 +1,23 @@
+# Generated by Django 3.1.1 on 2026-10-17 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0003_diagnostics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutionspace',
+            name='pruned_permutations',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='The number of permutations, which were not saved by the strategy.'),
+        ),
+        migrations.AddField(
+            model_name='solutionspace',
+            name='strategy',
+            field=models.CharField(choices=[('full', 'full'), ('pareto', 'pareto')], default='full', editable=False, help_text='The strategy used for creating the permutations. full: All permutations are saved. pareto: Only the permutations, which are not dominated by another permutation (worse or equal in price, time and CO2-eq.), are saved.', max_length=50),
+        ),
+    ]
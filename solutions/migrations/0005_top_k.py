@@ -0,0 +1,23 @@
+# Generated by Django 3.1.1 on 2026-10-17 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0004_strategy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutionspace',
+            name='bounds',
+            field=models.JSONField(blank=True, editable=False, help_text='The minimum and maximum price, time and CO2-eq. of all permutations (also of the permutations, which were not saved by the strategy).', null=True),
+        ),
+        migrations.AlterField(
+            model_name='solutionspace',
+            name='strategy',
+            field=models.CharField(choices=[('full', 'full'), ('pareto', 'pareto'), ('top_k', 'top_k')], default='full', editable=False, help_text='The strategy used for creating the permutations. full: All permutations are saved. pareto: Only the permutations, which are not dominated by another permutation (worse or equal in price, time and CO2-eq.), are saved. top_k: Only the best permutations regarding the evaluation method of the part are saved.', max_length=50),
+        ),
+    ]
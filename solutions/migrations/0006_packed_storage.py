@@ -0,0 +1,24 @@
+# Generated by Django 3.1.1 on 2026-10-17 19:58
+
+from django.db import migrations, models
+import solutions.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0005_top_k'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutionspace',
+            name='packed_permutations',
+            field=models.FileField(blank=True, editable=False, help_text='The packed permutations (storage: packed).', null=True, upload_to=solutions.models.solution_space_upload_path),
+        ),
+        migrations.AddField(
+            model_name='solutionspace',
+            name='storage',
+            field=models.CharField(choices=[('rows', 'rows'), ('packed', 'packed')], default='rows', editable=False, help_text='The storage of the permutations. rows: Each permutation is saved with its solutions and consumables. packed: All permutations are saved as arrays in one file. The permutations of a rank are only saved, when the rank is opened.', max_length=50),
+        ),
+    ]
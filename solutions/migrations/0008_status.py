@@ -0,0 +1,42 @@
+# Generated by Django 3.1.1 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+def finish_solution_spaces(apps, schema_editor):
+    """
+    The existing solution spaces are complete.
+    """
+    SolutionSpace = apps.get_model('solutions', 'SolutionSpace')
+    SolutionSpace.objects.update(status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0007_estimate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solutionspace',
+            name='cursor',
+            field=models.JSONField(blank=True, editable=False, help_text='The last committed chunk of permutations. A resumed search continues after it.', null=True),
+        ),
+        migrations.AddField(
+            model_name='solutionspace',
+            name='processed_permutations',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='The number of permutations, which are saved.'),
+        ),
+        migrations.AddField(
+            model_name='solutionspace',
+            name='status',
+            field=models.CharField(choices=[('pending', 'pending'), ('matching', 'matching'), ('costing', 'costing'), ('evaluating', 'evaluating'), ('done', 'done'), ('failed', 'failed')], default='pending', editable=False, help_text='The status of the search. An interrupted search (pending, matching, costing or evaluating) can be resumed from the cursor.', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='solutionspace',
+            name='total_permutations',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='The number of permutations, which are saved by the strategy.'),
+        ),
+        migrations.RunPython(finish_solution_spaces, migrations.RunPython.noop),
+    ]
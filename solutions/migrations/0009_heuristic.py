@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solutions', '0008_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='solutionspace',
+            name='strategy',
+            field=models.CharField(choices=[('full', 'full'), ('pareto', 'pareto'), ('top_k', 'top_k'), ('sampled', 'sampled'), ('heuristic', 'heuristic')], default='full', editable=False, help_text='The strategy used for creating the permutations. full: All permutations are saved. pareto: Only the permutations, which are not dominated by another permutation (worse or equal in price, time and CO2-eq.), are saved. top_k: Only the best permutations regarding the evaluation method of the part are saved. sampled: Only a uniform random sample of the permutations is saved. heuristic: Only the approximate Pareto front, which is searched with an evolutionary algorithm, is saved.', max_length=50),
+        ),
+    ]
@@ -5,6 +5,33 @@ import uuid
 
 from core import models as core_models
 
+STORAGES = (
+    ('rows', 'rows'),
+    ('packed', 'packed'),
+)
+
+STATUSES = (
+    ('pending', 'pending'),
+    ('matching', 'matching'),
+    ('costing', 'costing'),
+    ('evaluating', 'evaluating'),
+    ('done', 'done'),
+    ('failed', 'failed'),
+)
+
+STRATEGIES = (
+    ('full', 'full'),
+    ('pareto', 'pareto'),
+    ('top_k', 'top_k'),
+    ('sampled', 'sampled'),
+    ('heuristic', 'heuristic'),
+)
+
+
+def solution_space_upload_path(instance, filename):
+    # File will be uploaded to MEDIA_ROOT/solution_spaces/<filename>
+    return 'solution_spaces/{0}'.format(filename)
+
 
 class ConsumableCost(models.Model):
     """
@@ -180,6 +207,70 @@ class SolutionSpace(models.Model):
                                           related_name="SolutionSpace",
                                           help_text="All permutations for this solution space.",
                                           blank=True)
+    diagnostics = models.JSONField(help_text="Diagnostics of matching the part process steps with the resource "
+                                             "skills (considered and rejected resource skills per constraint).",
+                                   blank=True,
+                                   null=True,
+                                   editable=False)
+    strategy = models.CharField(max_length=50,
+                                choices=STRATEGIES,
+                                default="full",
+                                help_text="The strategy used for creating the permutations. "
+                                          "full: All permutations are saved. "
+                                          "pareto: Only the permutations, which are not dominated by another "
+                                          "permutation (worse or equal in price, time and CO2-eq.), are saved. "
+                                          "top_k: Only the best permutations regarding the evaluation method "
+                                          "of the part are saved. "
+                                          "sampled: Only a uniform random sample of the permutations is saved. "
+                                          "heuristic: Only the approximate Pareto front, which is searched with "
+                                          "an evolutionary algorithm, is saved.",
+                                editable=False)
+    pruned_permutations = models.PositiveBigIntegerField(help_text="The number of permutations, "
+                                                                   "which were not saved by the strategy.",
+                                                         default=0,
+                                                         editable=False)
+    storage = models.CharField(max_length=50,
+                               choices=STORAGES,
+                               default="rows",
+                               help_text="The storage of the permutations. "
+                                         "rows: Each permutation is saved with its solutions and consumables. "
+                                         "packed: All permutations are saved as arrays in one file. "
+                                         "The permutations of a rank are only saved, when the rank is opened.",
+                               editable=False)
+    packed_permutations = models.FileField(upload_to=solution_space_upload_path,
+                                           help_text="The packed permutations (storage: packed).",
+                                           blank=True,
+                                           null=True,
+                                           editable=False)
+    bounds = models.JSONField(help_text="The minimum and maximum price, time and CO2-eq. of all permutations "
+                                        "(also of the permutations, which were not saved by the strategy).",
+                              blank=True,
+                              null=True,
+                              editable=False)
+    estimate = models.JSONField(help_text="The estimated number of permutations, rows and bytes of the solution "
+                                          "space, which decided the strategy.",
+                                blank=True,
+                                null=True,
+                                editable=False)
+    status = models.CharField(max_length=50,
+                              choices=STATUSES,
+                              default="pending",
+                              help_text="The status of the search. An interrupted search (pending, matching, costing "
+                                        "or evaluating) can be resumed from the cursor.",
+                              editable=False)
+    processed_permutations = models.PositiveBigIntegerField(help_text="The number of permutations, "
+                                                                      "which are saved.",
+                                                            default=0,
+                                                            editable=False)
+    total_permutations = models.PositiveBigIntegerField(help_text="The number of permutations, "
+                                                                  "which are saved by the strategy.",
+                                                        default=0,
+                                                        editable=False)
+    cursor = models.JSONField(help_text="The last committed chunk of permutations. "
+                                        "A resumed search continues after it.",
+                              blank=True,
+                              null=True,
+                              editable=False)
 
     # Meta.
     created_at = models.DateTimeField(auto_now_add=True,
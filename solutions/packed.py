@@ -0,0 +1,302 @@
+"""
+Implementation of the packed storage of the permutations of a solution space.
+
+Instead of one Permutation row (with Solution and ConsumableCost rows) per permutation, all permutations are
+saved as numpy arrays in one compressed .npz file (MEDIA_ROOT/solution_spaces/):
+
+-   For each manufacturing possibility: the part process steps, the ordered lists of candidate resource skills
+    and their costs (the cost table).
+
+-   For each permutation: the index of its cost table, its choices (the index of the chosen resource skill
+    of each part process step), the price, time, co2, comparison value and rank.
+
+The permutations are ranked on the arrays. The Permutation rows are only created (materialized)
+for the ranks, which are opened.
+"""
+import io
+import json
+import logging
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from core import models as core_models
+from solutions import models as solutions_models
+from solutions import costing
+from solutions import critic
+from solutions import persistence
+
+# Third party packages.
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PackedPermutations:
+    """
+    The permutations of a solution space as arrays.
+    """
+
+    ARRAYS = ('table_indexes', 'choices', 'price', 'time', 'co2', 'comparison_value', 'rank')
+    """The arrays with one entry (row) per permutation."""
+
+    RANKING_ARRAYS = ('table_indexes', 'price', 'time', 'co2', 'comparison_value', 'rank')
+    """The arrays, which are needed to show the ranking."""
+
+    def __init__(self, tables: list, arrays: dict):
+        """
+        :param tables: List containing a dictionary for each cost table with the manufacturing possibility,
+        the ids of the part process steps, the ids of the candidate resource skills, the ids of the consumables,
+        the costs and the consumable costs of the candidates.
+        :param arrays: Dictionary containing the arrays of the permutations (see ARRAYS).
+        The choices are filled with -1 for cost tables with less part process steps.
+        """
+        self.tables = tables
+        self.arrays = arrays
+
+    def __len__(self):
+        return len(self.arrays['rank'])
+
+    @classmethod
+    def load(cls, solution_space: solutions_models.SolutionSpace):
+        """
+        Load the packed permutations of a solution space.
+        """
+        with solution_space.packed_permutations.open('rb') as file:
+            data = np.load(io.BytesIO(file.read()))
+            tables = json.loads(str(data['tables']))
+            for t, table in enumerate(tables):
+                table['costs'] = {criterion: [] for criterion in costing.CRITERIA}
+                table['consumable_costs'] = []
+                for s in range(len(table['part_process_steps'])):
+                    costs = data['costs_{0}_{1}'.format(t, s)]
+                    for c, criterion in enumerate(costing.CRITERIA):
+                        table['costs'][criterion].append(costs[:, c])
+                    consumable_costs = data['consumable_costs_{0}_{1}'.format(t, s)]
+                    table['consumable_costs'].append({criterion: consumable_costs[:, :, c] for c, criterion
+                                                      in enumerate(costing.CONSUMABLE_CRITERIA)})
+            arrays = {name: data[name] for name in cls.ARRAYS}
+        return cls(tables, arrays)
+
+    @classmethod
+    def load_ranking(cls, solution_space: solutions_models.SolutionSpace):
+        """
+        Load only the ranking of the packed permutations of a solution space (see RANKING_ARRAYS).
+        The choices and the costs of the candidates are not read, so the tables only contain
+        the manufacturing possibility and the ids.
+        """
+        with solution_space.packed_permutations.open('rb') as file:
+            # The arrays of a .npz file are only read, when they are accessed.
+            data = np.load(file)
+            tables = json.loads(str(data['tables']))
+            arrays = {name: data[name] for name in cls.RANKING_ARRAYS}
+        return cls(tables, arrays)
+
+    def save(self, solution_space: solutions_models.SolutionSpace):
+        """
+        Save the packed permutations as compressed .npz file of the solution space.
+        """
+        data = {name: self.arrays[name] for name in self.ARRAYS}
+        tables = []
+        for t, table in enumerate(self.tables):
+            tables.append({key: table[key] for key in ('manufacturing_possibility', 'part_process_steps',
+                                                       'resource_skills', 'consumables')})
+            for s in range(len(table['part_process_steps'])):
+                data['costs_{0}_{1}'.format(t, s)] = np.column_stack([table['costs'][criterion][s]
+                                                                     for criterion in costing.CRITERIA])
+                data['consumable_costs_{0}_{1}'.format(t, s)] = np.stack(
+                    [table['consumable_costs'][s][criterion] for criterion in costing.CONSUMABLE_CRITERIA], axis=2)
+        data['tables'] = np.array(json.dumps(tables))
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **data)
+        if solution_space.packed_permutations:
+            solution_space.packed_permutations.delete(save=False)
+        solution_space.packed_permutations.save('{0}.npz'.format(str(solution_space.pk)),
+                                                ContentFile(buffer.getvalue()),
+                                                save=False)
+        solution_space.save()
+
+    def get_values(self) -> np.ndarray:
+        """
+        Get the price, time and co2 of all permutations.
+
+        return: Array with one row per permutation and one column per criterion.
+        """
+        return np.column_stack([self.arrays[criterion] for criterion in costing.CRITERIA])
+
+    def get_cost_table(self, table_index: int) -> costing.CostTable:
+        """
+        Create the cost table with the part process step, resource skill and consumable objects.
+
+        :param table_index: The index of the cost table.
+        return: The cost table.
+        """
+        table = self.tables[table_index]
+        part_process_steps = core_models.PartProcessStep.objects.in_bulk(table['part_process_steps'])
+        resource_skills = core_models.ResourceSkill.objects.in_bulk(
+            [resource_skill_id for candidates in table['resource_skills'] for resource_skill_id in candidates])
+        consumables = core_models.Consumable.objects.in_bulk(table['consumables'])
+        return costing.CostTable(
+            table['manufacturing_possibility'],
+            [part_process_steps[get_pk(core_models.PartProcessStep, part_process_step_id)]
+             for part_process_step_id in table['part_process_steps']],
+            [[resource_skills[get_pk(core_models.ResourceSkill, resource_skill_id)]
+              for resource_skill_id in candidates] for candidates in table['resource_skills']],
+            table['costs'],
+            [consumables[get_pk(core_models.Consumable, consumable_id)] for consumable_id in table['consumables']],
+            table['consumable_costs'])
+
+
+def get_pk(model, value):
+    """
+    Convert the saved (string) primary key to the primary key type of the model.
+    """
+    return model._meta.pk.to_python(value)
+
+
+class PackedWriter:
+    """
+    Collects the permutations of a solution space and saves them packed (see PermutationWriter).
+    """
+    resumable = False
+    """The permutations are only saved, when all are written. So an interrupted search has to start over."""
+
+    def __init__(self, solution_space: solutions_models.SolutionSpace):
+        self.solution_space = solution_space
+        self.cost_tables = []
+        self.chunks = {name: [] for name in PackedPermutations.ARRAYS}
+
+    def get_table_index(self, cost_table: costing.CostTable) -> int:
+        """
+        Get the index of the cost table. The cost table is added, if it is not known yet.
+        """
+        for table_index, known_cost_table in enumerate(self.cost_tables):
+            if known_cost_table is cost_table:
+                return table_index
+        self.cost_tables.append(cost_table)
+        return len(self.cost_tables) - 1
+
+    def write(self, cost_table: costing.CostTable, choices, totals: dict):
+        """
+        Add a chunk of permutations.
+
+        :param cost_table: The cost table of the manufacturing possibility of the permutations.
+        :param choices: Array with the index of the chosen resource skill for each part process step per permutation.
+        :param totals: Dictionary containing the arrays of the total price, time and co2 of the permutations.
+        """
+        self.chunks['table_indexes'].append(np.full(len(choices), self.get_table_index(cost_table), dtype=np.int64))
+        self.chunks['choices'].append(np.asarray(choices, dtype=np.int64))
+        for criterion in costing.CRITERIA:
+            self.chunks[criterion].append(np.asarray(totals[criterion], dtype=float))
+        self.chunks['comparison_value'].append(np.full(len(choices), np.nan))
+        self.chunks['rank'].append(np.zeros(len(choices), dtype=np.int64))
+
+    def close(self):
+        """
+        Save all permutations in the packed file of the solution space.
+        """
+        steps = max([len(cost_table.shape) for cost_table in self.cost_tables], default=0)
+        # Fill the choices of cost tables with less part process steps.
+        self.chunks['choices'] = [np.pad(choices, ((0, 0), (0, steps - choices.shape[1])), constant_values=-1)
+                                  for choices in self.chunks['choices']]
+        arrays = {}
+        for name, chunks in self.chunks.items():
+            if chunks:
+                arrays[name] = np.concatenate(chunks)
+            elif name == 'choices':
+                arrays[name] = np.zeros((0, steps), dtype=np.int64)
+            else:
+                arrays[name] = np.zeros(0, dtype=float if name in costing.CRITERIA + ('comparison_value',)
+                                        else np.int64)
+
+        tables = [{'manufacturing_possibility': cost_table.manufacturing_possibility,
+                   'part_process_steps': [str(part_process_step.pk)
+                                          for part_process_step in cost_table.part_process_steps],
+                   'resource_skills': [[str(resource_skill.pk) for resource_skill in candidates]
+                                       for candidates in cost_table.resource_skills],
+                   'consumables': [str(consumable.pk) for consumable in cost_table.consumables],
+                   'costs': cost_table.costs,
+                   'consumable_costs': cost_table.consumable_costs}
+                  for cost_table in self.cost_tables]
+        PackedPermutations(tables, arrays).save(self.solution_space)
+
+
+def evaluate(solution_space: solutions_models.SolutionSpace, sorted_fields: list):
+    """
+    Rank the packed permutations of a solution space with the evaluation method of the part.
+    The ranks and comparison values are the same as the ones of the evaluation of saved permutations.
+
+    :param solution_space: The solution space.
+    :param sorted_fields: The fields sorted by their importance (for the evaluation method 1).
+    """
+    try:
+        packed = PackedPermutations.load(solution_space)
+        values = packed.get_values()
+        method_number = solution_space.part.evaluation_method
+
+        if method_number == 1 or len(packed) <= 1:
+            if len(packed) <= 1:
+                logger.warning("Could not evaluate the permutations, since there is only one.")
+            # Order the permutations by the given fields. The first field is the most important one.
+            order = np.lexsort([packed.arrays[field] for field in reversed(sorted_fields)])
+            packed.arrays['rank'][order] = np.arange(1, len(packed) + 1)
+        elif method_number in (2, 3):
+            bounds = None
+            if solution_space.bounds:
+                # Not all permutations are saved. So the bounds of all permutations are used.
+                bounds = [solution_space.bounds[criterion] for criterion in costing.CRITERIA]
+            normalized_values = critic.normalize_values(values, bounds=bounds, max_best=False)
+            if method_number == 2:
+                weights = np.array([solution_space.part.price_importance,
+                                    solution_space.part.time_importance,
+                                    solution_space.part.co2_importance], dtype=float)
+            else:
+                weights = critic.get_weights(normalized_values)
+            rank_values = normalized_values @ weights
+            packed.arrays['comparison_value'] = rank_values
+            packed.arrays['rank'] = critic.get_ranks(rank_values)
+        else:
+            logger.error("Given method number '{0}' is not defined.".format(str(method_number)))
+            return
+
+        packed.save(solution_space)
+
+    except Exception as e:
+        logger.error("Could not evaluate the packed permutations of solution_space '{0}'."
+                     .format(str(solution_space)), exc_info=True)
+
+
+def materialize(solution_space: solutions_models.SolutionSpace, rank: int) -> list:
+    """
+    Create the Permutation rows (with the solutions and consumables) of the packed permutations with the given rank.
+    Permutations, which are already materialized, are returned directly.
+    At most SOLUTION_SPACE_MATERIALIZE_LIMIT permutations of a rank are created. Permutations, which are not ranked
+    (rank 0), are never created.
+
+    :param solution_space: The solution space.
+    :param rank: The rank.
+    return: List of the permutations with the rank.
+    """
+    if rank < 1:
+        return []
+    permutations = list(solution_space.permutations.filter(rank=rank))
+    if permutations:
+        return permutations
+
+    packed = PackedPermutations.load(solution_space)
+    solutions = persistence.get_solutions(solution_space)
+    rows = np.flatnonzero(packed.arrays['rank'] == rank)[:getattr(settings, 'SOLUTION_SPACE_MATERIALIZE_LIMIT', 100)]
+    for table_index in np.unique(packed.arrays['table_indexes'][rows]):
+        table_rows = rows[packed.arrays['table_indexes'][rows] == table_index]
+        cost_table = packed.get_cost_table(int(table_index))
+        choices = packed.arrays['choices'][table_rows, :len(cost_table.shape)]
+        persistence.save_permutations(solution_space=solution_space,
+                                      cost_table=cost_table,
+                                      choices=choices,
+                                      totals={criterion: packed.arrays[criterion][table_rows]
+                                              for criterion in costing.CRITERIA},
+                                      solutions=solutions,
+                                      evaluations={name: packed.arrays[name][table_rows]
+                                                   for name in ('rank', 'comparison_value')})
+    return list(solution_space.permutations.filter(rank=rank))
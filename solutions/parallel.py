@@ -0,0 +1,132 @@
+"""
+Implementation of matching the part process steps of a part in parallel.
+
+The constraints of all part process steps are compiled in the calling process. Then the part process steps
+are fanned out to a thread or process pool (MATCHING_EXECUTOR) with a configurable number of workers
+(MATCHING_WORKERS). The python and numpy matchers hold an immutable snapshot of the catalog
+(capability index or feasibility matrix), so the workers do not require a database connection.
+The results are returned in the order of the part process steps.
+"""
+import concurrent.futures
+import pickle
+import os
+import logging
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+from solutions import matching
+from solutions import matching_cache
+
+logger = logging.getLogger(__name__)
+
+_worker_matcher = None
+"""The matcher of a worker process."""
+
+
+def initialize_worker(pickled_matcher: bytes):
+    """
+    Initialize a worker process with the matcher (and its catalog snapshot).
+    The matcher is unpickled after django is set up, since spawned processes start without django.
+    """
+    global _worker_matcher
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plafosus.settings')
+        django.setup()
+    _worker_matcher = pickle.loads(pickled_matcher)
+
+
+def match_in_worker(process_step_id, compiled_constraints: list) -> list:
+    """
+    Match the compiled constraints of one part process step in a worker process.
+    """
+    return _worker_matcher.match_constraints(process_step_id, compiled_constraints)
+
+
+def match_in_thread(matcher, process_step_id, compiled_constraints: list) -> list:
+    """
+    Match the compiled constraints of one part process step in a worker thread.
+    Database connections are opened per thread, so they are closed afterwards.
+    """
+    try:
+        return matcher.match_constraints(process_step_id, compiled_constraints)
+    finally:
+        connections.close_all()
+
+
+def match_part_process_steps(matcher, part_process_steps: list, workers: int = None, executor: str = None) -> list:
+    """
+    Find the resource skills for all given part process steps.
+
+    :param matcher: The matcher (with the method match_constraints) or a CachedMatcher wrapping it.
+    :param part_process_steps: List of part process steps.
+    :param workers: The number of workers. Default: MATCHING_WORKERS. With 1 worker, the steps are matched serially.
+    :param executor: 'thread' or 'process'. Default: MATCHING_EXECUTOR.
+    return: List of results in the order of the part process steps.
+    A result is either the list of resource skills or the exception raised while matching the part process step.
+    """
+    if workers is None:
+        workers = getattr(settings, 'MATCHING_WORKERS', 1)
+    if executor is None:
+        executor = getattr(settings, 'MATCHING_EXECUTOR', 'thread')
+
+    def match_function(snapshot_matcher, steps):
+        return _match(snapshot_matcher, steps, workers, executor)
+
+    if isinstance(matcher, matching_cache.CachedMatcher):
+        # Only the part process steps, which are not cached, are matched.
+        return matcher.match_many(part_process_steps, match_function)
+    return match_function(matcher, part_process_steps)
+
+
+def _match(matcher, part_process_steps: list, workers: int, executor: str) -> list:
+    """
+    Compile the constraints of the part process steps and match them serially or with a pool of workers.
+    """
+    results = [None] * len(part_process_steps)
+    tasks = {}
+    """Dictionary containing the index of the part process step as key and
+    the process step id and compiled constraints as value."""
+    for i, part_process_step in enumerate(part_process_steps):
+        try:
+            tasks[i] = (part_process_step.process_step_id, matching.compile_constraints(part_process_step))
+        except Exception as e:
+            results[i] = e
+
+    if workers <= 1 or len(tasks) <= 1:
+        for i, (process_step_id, compiled_constraints) in tasks.items():
+            try:
+                results[i] = matcher.match_constraints(process_step_id, compiled_constraints)
+            except Exception as e:
+                results[i] = e
+        return results
+
+    if executor == 'process' and getattr(matcher, 'requires_database', False):
+        logger.warning("The matching engine requires a database connection. "
+                       "Using a thread pool instead of a process pool.")
+        executor = 'thread'
+
+    if executor == 'process':
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                      initializer=initialize_worker,
+                                                      initargs=(pickle.dumps(matcher),))
+        futures = {i: pool.submit(match_in_worker, process_step_id, compiled_constraints)
+                   for i, (process_step_id, compiled_constraints) in tasks.items()}
+    else:
+        if executor != 'thread':
+            logger.error("Given matching executor '{0}' is not defined. Using a thread pool."
+                         .format(str(executor)))
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        futures = {i: pool.submit(match_in_thread, matcher, process_step_id, compiled_constraints)
+                   for i, (process_step_id, compiled_constraints) in tasks.items()}
+
+    with pool:
+        # Merge the results in the order of the part process steps.
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = e
+    return results
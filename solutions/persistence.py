@@ -0,0 +1,280 @@
+"""
+Implementation of saving permutations as rows (Permutation, Solution and ConsumableCost).
+
+The permutations are saved chunk by chunk. The objects of a chunk are collected first and then
+inserted with bulk_create (incl. the many2many relations) in one transaction.
+A solution is determined by its part process step and resource skill, so it is only created once
+per solution space and shared by all permutations containing it.
+The consumable costs are sparse: Only the consumables, which are used (non-zero quantity, price or co2),
+are saved for a solution and as overall consumables of a permutation. A missing consumable has zero costs.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+import numpy as np
+
+from core import models as core_models
+from solutions import models as solutions_models
+from solutions import costing
+
+
+def get_solutions(solution_space: solutions_models.SolutionSpace) -> dict:
+    """
+    Get the solutions, which are already saved for the permutations of a solution space.
+
+    :param solution_space: The solution space.
+    return: Dictionary containing the (part process step id, resource skill id) and the id of the according solution.
+    """
+    return {(part_process_step_id, resource_skill_id): solution_id
+            for part_process_step_id, resource_skill_id, solution_id in solutions_models.Solution.objects.filter(
+                Permutation__SolutionSpace=solution_space).values_list(
+                'part_process_step_id', 'resource_skill_id', 'id').distinct()}
+
+
+def delete_permutations(solution_space: solutions_models.SolutionSpace):
+    """
+    Delete the saved permutations of a solution space with their solutions and consumable costs.
+
+    :param solution_space: The solution space.
+    """
+    permutations = solutions_models.Permutation.objects.filter(SolutionSpace=solution_space)
+    with transaction.atomic():
+        solutions_models.ConsumableCost.objects.filter(Q(Permutation__in=permutations) |
+                                                       Q(Solution__Permutation__in=permutations)).delete()
+        solutions_models.Solution.objects.filter(Permutation__in=permutations).delete()
+        permutations.delete()
+
+
+class PermutationWriter:
+    """
+    Saves the permutations of a solution space as rows chunk by chunk.
+    """
+    resumable = True
+    """The permutations are committed with each chunk, so an interrupted search can continue after them."""
+
+    def __init__(self, solution_space: solutions_models.SolutionSpace):
+        self.solution_space = solution_space
+        self.solutions = None
+        """The solutions of the solution space, which are shared by all permutations.
+        They are loaded with the first chunk, since a resumed search can already have saved solutions."""
+
+    def write(self, cost_table: costing.CostTable, choices, totals: dict):
+        """
+        Save a chunk of permutations (see save_permutations).
+        """
+        if self.solutions is None:
+            self.solutions = get_solutions(self.solution_space)
+        save_permutations(self.solution_space, cost_table, choices, totals, self.solutions)
+
+    def close(self):
+        """
+        All permutations are written. The rows are already saved with each chunk.
+        """
+        pass
+
+
+BULK_MODELS = (solutions_models.ConsumableCost,
+               solutions_models.Solution,
+               solutions_models.Permutation,
+               solutions_models.Solution.consumables.through,
+               solutions_models.Permutation.consumables.through,
+               solutions_models.Permutation.solutions.through,
+               solutions_models.SolutionSpace.permutations.through)
+"""The models created for the permutations in the order of their insertion."""
+
+
+def save_permutations(solution_space: solutions_models.SolutionSpace,
+                      cost_table: costing.CostTable,
+                      choices,
+                      totals: dict,
+                      solutions: dict,
+                      evaluations: dict = None):
+    """
+    Save a chunk of permutations with their solutions and consumables in one transaction.
+    The objects are collected first and then inserted with bulk_create (incl. the many2many relations).
+
+    :param solution_space: The solution space to save the calculations.
+    :param cost_table: The cost table of the manufacturing possibility of the permutations.
+    :param choices: Array with the index of the chosen resource skill for each part process step per permutation.
+    :param totals: Dictionary containing the arrays of the total price, time and co2 of the permutations.
+    :param solutions: Dictionary containing the (part process step id, resource skill id) and the id of
+    the according solution, which is already created for this solution space. It is updated with the new solutions.
+    :param evaluations: Optional dictionary containing the arrays of the rank and the comparison value
+    of the already evaluated permutations.
+    """
+    rows = {model: [] for model in BULK_MODELS}
+    """Dictionary containing the model and the list of the objects, which are created."""
+    # The overall consumables of all permutations of the chunk are summed at once.
+    consumable_totals = cost_table.get_consumable_totals(np.asarray(choices))
+    for row, choice in enumerate(choices):
+        permutation = create_permutation(rows=rows,
+                                         solutions=solutions,
+                                         solution_space=solution_space,
+                                         cost_table=cost_table,
+                                         choice=choice,
+                                         price=float(totals['price'][row]),
+                                         time=float(totals['time'][row]),
+                                         co2=float(totals['co2'][row]),
+                                         consumables={criterion: values[row]
+                                                      for criterion, values in consumable_totals.items()})
+        if evaluations is not None:
+            permutation.rank = int(evaluations['rank'][row])
+            comparison_value = evaluations['comparison_value'][row]
+            permutation.comparison_value = None if np.isnan(comparison_value) else round(float(comparison_value), 3)
+
+    with transaction.atomic():
+        for model, objects in rows.items():
+            model.objects.bulk_create(objects)
+
+
+def create_permutation(rows: dict,
+                       solutions: dict,
+                       solution_space: solutions_models.SolutionSpace,
+                       cost_table: costing.CostTable,
+                       choice,
+                       price: float,
+                       time: float,
+                       co2: float,
+                       consumables: dict):
+    """
+    Create one permutation with its solutions and consumables (without saving them).
+
+    :param rows: Dictionary containing the model and the list of the objects, which are created.
+    :param solutions: Dictionary containing the (part process step id, resource skill id) and the id of
+    the according solution. A solution is only created once per solution space and shared by the permutations.
+    :param solution_space: The solution space to save the calculations.
+    :param cost_table: The cost table of the manufacturing possibility of the permutation.
+    :param choice: The index of the chosen resource skill for each part process step.
+    :param price: The total price of the permutation.
+    :param time: The total time of the permutation.
+    :param co2: The total co2 of the permutation.
+    :param consumables: Dictionary containing the arrays of the overall quantity, price and co2
+    of the consumables of the permutation (indexed like the consumables of the cost table).
+    return: The permutation.
+    """
+    part_process_steps = cost_table.part_process_steps
+    """List of all part_process_steps for this manufacturing possibility."""
+
+    # Create a new object for this permutation with the calculated sums.
+    permutation = solutions_models.Permutation(manufacturing_possibility=cost_table.manufacturing_possibility,
+                                               price=price,
+                                               time=time,
+                                               co2=co2)
+    rows[solutions_models.Permutation].append(permutation)
+
+    # TODO: Add further permutation properties for the later evaluation. E.g.:
+    #       - Number of required resources
+    #       - Distance Part has to travel (Does this make sense?)
+    #       - Consumables
+    #       - ???
+
+    # Iterate over all part process steps and the chosen resource skills of the permutation.
+    for i, index in enumerate(choice):
+        resource_skill = cost_table.resource_skills[i][index]
+
+        # The solution is determined by the part process step and the resource skill.
+        # So it is only created for the first permutation containing it.
+        key = (part_process_steps[i].pk, resource_skill.pk)
+        if key not in solutions:
+            solutions[key] = create_solution(rows=rows,
+                                             part_process_step=part_process_steps[i],
+                                             resource_skill=resource_skill,
+                                             cost_table=cost_table,
+                                             step=i,
+                                             index=index)
+
+        # Add the solution object to the permutation.
+        rows[solutions_models.Permutation.solutions.through].append(
+            solutions_models.Permutation.solutions.through(permutation_id=permutation.pk,
+                                                           solution_id=solutions[key]))
+
+    # Create a ConsumableCost object for the overall consumables of the permutation. Their totals are summed
+    # over the chosen resource skills (see CostTable.get_consumable_totals), so each one is written once.
+    # Only the overall consumables, which are used by the permutation, are saved.
+    # A missing consumable has zero costs.
+    for j, consumable_object in enumerate(cost_table.consumables):
+        consumable_quantity = float(consumables['quantity'][j])
+        consumable_price = float(consumables['price'][j])
+        consumable_co2 = float(consumables['co2'][j])
+        if not is_used(consumable_quantity, consumable_price, consumable_co2):
+            continue
+
+        consumable = solutions_models.ConsumableCost(consumable=consumable_object,
+                                                     is_overall=True,
+                                                     quantity=consumable_quantity,
+                                                     price=consumable_price,
+                                                     co2=consumable_co2)
+        rows[solutions_models.ConsumableCost].append(consumable)
+        # Add the ConsumableCost object to the permutation.
+        rows[solutions_models.Permutation.consumables.through].append(
+            solutions_models.Permutation.consumables.through(permutation_id=permutation.pk,
+                                                             consumablecost_id=consumable.pk))
+
+    # Add the created permutation object to the solution_space.
+    rows[solutions_models.SolutionSpace.permutations.through].append(
+        solutions_models.SolutionSpace.permutations.through(solutionspace_id=solution_space.pk,
+                                                            permutation_id=permutation.pk))
+    return permutation
+
+
+def create_solution(rows: dict,
+                    part_process_step: core_models.PartProcessStep,
+                    resource_skill: core_models.ResourceSkill,
+                    cost_table: costing.CostTable,
+                    step: int,
+                    index: int):
+    """
+    Create the solution of a resource skill performing a part process step with its consumables
+    (without saving them).
+
+    :param rows: Dictionary containing the model and the list of the objects, which are created.
+    :param part_process_step: The part process step.
+    :param resource_skill: The resource skill.
+    :param cost_table: The cost table containing the costs of the resource skill.
+    :param step: The index of the part process step in the cost table.
+    :param index: The index of the resource skill in the candidates of the part process step.
+    return: The id of the solution.
+    """
+    consumable_costs = cost_table.consumable_costs[step]
+
+    # Create a new solution object (for each resource_skill).
+    solution = solutions_models.Solution(
+        part_process_step=part_process_step,
+        manufacturing_sequence_number=part_process_step.manufacturing_sequence_number,
+        resource_skill=resource_skill,
+        quantity=part_process_step.required_quantity,
+        price=float(cost_table.costs['price'][step][index]),
+        time=float(cost_table.costs['time'][step][index]),
+        co2=float(cost_table.costs['co2'][step][index]))
+    rows[solutions_models.Solution].append(solution)
+
+    # Add the consumables for one resource_skill.
+    for j, consumable_object in enumerate(cost_table.consumables):
+        quantity = float(consumable_costs['quantity'][index, j])
+        price = float(consumable_costs['price'][index, j])
+        co2 = float(consumable_costs['co2'][index, j])
+        # Only the consumables, which are used by the resource skill, are saved.
+        # A missing consumable has zero costs.
+        if not is_used(quantity, price, co2):
+            continue
+
+        consumable = solutions_models.ConsumableCost(
+            consumable=consumable_object,
+            is_overall=False,
+            quantity=quantity,
+            price=price,
+            co2=co2)
+        rows[solutions_models.ConsumableCost].append(consumable)
+        # Add the consumable to the many2many field of the solution.
+        rows[solutions_models.Solution.consumables.through].append(
+            solutions_models.Solution.consumables.through(solution_id=solution.pk,
+                                                          consumablecost_id=consumable.pk))
+    return solution.pk
+
+
+def is_used(quantity: float, price: float, co2: float) -> bool:
+    """
+    Check, if a consumable is used (it has a quantity, price or co2 unequal zero).
+    Only the consumable costs of used consumables are saved.
+    """
+    return quantity != 0 or price != 0 or co2 != 0
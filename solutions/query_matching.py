@@ -0,0 +1,131 @@
+"""
+Implementation of a matching engine, which pushes the matching down to the database.
+
+For each part process step one ResourceSkill queryset is created:
+The resource skill has a skill for the process step AND for every constraint there EXISTS an ability
+with a value, which satisfies the constraint. The typed shadow columns of the abilities
+(numeric_value, boolean_value and text_value) are compared, so the database can use its indexes.
+"""
+from django.db.models import Exists, OuterRef, Q
+
+from core import models as core_models
+from solutions import matching
+
+LOOKUPS = {
+    '=': 'exact',
+    '<': 'lt',
+    '>': 'gt',
+    '<=': 'lte',
+    '>=': 'gte'
+}
+"""The field lookups of the operators. The operator '!=' is realized by excluding 'exact'."""
+
+FIELDS = {
+    int: 'numeric_value',
+    float: 'numeric_value',
+    bool: 'boolean_value',
+    str: 'text_value'
+}
+"""The typed shadow columns of the abilities in dependence of the type of the constraint value."""
+
+
+def get_ability_condition(constraint: matching.CompiledConstraint) -> Exists:
+    """
+    Create the condition, that there is an ability of the resource skill, which fulfills the constraint.
+
+    :param constraint: The compiled constraint.
+    return: Exists expression referencing the primary key of the outer ResourceSkill queryset.
+    """
+    field = FIELDS[type(constraint.value)]
+    abilities = core_models.Ability.objects.filter(resource_skill=OuterRef('pk'),
+                                                   requirement_id=constraint.requirement_id,
+                                                   **{field + '__isnull': False})
+    if constraint.compare is None:
+        return Exists(abilities.none())
+
+    if isinstance(constraint.value, bool):
+        # Check which of both ability values fulfill the constraint.
+        abilities = abilities.filter(boolean_value__in=[ability_value for ability_value in (False, True)
+                                                        if constraint.compare(ability_value, constraint.value)])
+    elif constraint.operator == '!=':
+        abilities = abilities.exclude(**{field: constraint.value})
+    else:
+        abilities = abilities.filter(**{field + '__' + LOOKUPS[constraint.operator]: constraint.value})
+    return Exists(abilities)
+
+
+class QueryMatcher:
+    """
+    Matching engine, which filters the resource skills in the database.
+    """
+    requires_database = True
+    """The matching requires a database connection, so it can not be executed in a process pool."""
+
+    def get_queryset(self, process_step_id, compiled_constraints: list):
+        """
+        Create the queryset of the resource skills, which can perform the process step
+        and fulfill all compiled constraints.
+
+        :param process_step_id: The id of the process step.
+        :param compiled_constraints: List of compiled constraints of one part process step.
+        return: The ResourceSkill queryset.
+        """
+        mandatory_constraints, optional_groups = matching.group_constraints(compiled_constraints)
+
+        queryset = core_models.ResourceSkill.objects.filter(
+            skill__process_step_id=process_step_id).select_related('skill', 'resource')
+        for constraint in mandatory_constraints:
+            queryset = queryset.filter(get_ability_condition(constraint))
+        for constraints in optional_groups.values():
+            # At least one of the alternatives has to be fulfilled.
+            alternatives = Q()
+            for constraint in constraints:
+                alternatives |= Q(get_ability_condition(constraint))
+            queryset = queryset.filter(alternatives)
+        return queryset.order_by(*matching.ORDERING)
+
+    def match(self, part_process_step: core_models.PartProcessStep) -> list:
+        """
+        Find the resource skills, which can perform the process step of the part process step
+        and fulfill all its constraints.
+
+        :param part_process_step: The part process step.
+        return: List of resource skills.
+        """
+        return self.match_constraints(part_process_step.process_step_id,
+                                      matching.compile_constraints(part_process_step))
+
+    def match_constraints(self, process_step_id, compiled_constraints: list) -> list:
+        """
+        Find the resource skills, which can perform the process step and fulfill all compiled constraints.
+
+        :param process_step_id: The id of the process step.
+        :param compiled_constraints: List of compiled constraints of one part process step.
+        return: List of resource skills.
+        """
+        return list(self.get_queryset(process_step_id, compiled_constraints))
+
+    def diagnose(self, part_process_step: core_models.PartProcessStep) -> dict:
+        """
+        Count for the part process step, how many resource skills were considered and
+        how many were rejected by each constraint (and each optional group) or had no ability for its requirement.
+        A resource skill without an ability for the requirement is only counted as missing ability.
+
+        :param part_process_step: The part process step.
+        return: The diagnostics (see matching.get_diagnostics).
+        """
+        considered = core_models.ResourceSkill.objects.filter(skill__process_step_id=part_process_step.process_step_id)
+
+        def count(constraints):
+            with_ability = considered.filter(Exists(core_models.Ability.objects.filter(
+                resource_skill=OuterRef('pk'), requirement_id=constraints[0].requirement_id)))
+            alternatives = Q()
+            for constraint in constraints:
+                alternatives |= Q(get_ability_condition(constraint))
+            with_ability_count = with_ability.count()
+            return with_ability_count - with_ability.filter(alternatives).count(), considered_count - with_ability_count
+
+        considered_count = considered.count()
+        mandatory_constraints, optional_groups = matching.group_constraints(
+            matching.compile_constraints(part_process_step))
+        return matching.get_diagnostics(considered_count, mandatory_constraints, optional_groups, count)
@@ -1,24 +1,46 @@
-from statistics import stdev
 import operator
 import logging
-import itertools
+import time
+
+# Django imports.
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
 
 # App imports.
 from core import models as core_models
 from solutions import models as solutions_models
 from solutions import critic
+from solutions import matching
+from solutions import feasibility
+from solutions import query_matching
+from solutions import matching_cache
+from solutions import parallel
+from solutions import costing
+from solutions import persistence
+from solutions import packed
+from solutions import heuristic
 
 # Third party packages.
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
-TYPES = {
-    'int': int,
-    'float': float,
-    'str': str,
-    'bool': bool
-}
+BOUNDED_STRATEGIES = ('top_k', 'sampled', 'heuristic')
+"""The strategies, which can replace 'full' for too large solution spaces, since they do not enumerate
+all permutations ('pareto' enumerates the permutations of the pruned resource skills)."""
+
+ROW_BYTES = 200
+"""The estimated bytes of a saved row (incl. its indexes)."""
+
+PACKED_VALUE_BYTES = 8
+"""The bytes of a value of the packed arrays (before the compression)."""
+
+MAX_COUNT = models.BigIntegerField.MAX_BIGINT
+"""The largest number of permutations, which can be saved in a PositiveBigIntegerField."""
+
+HEARTBEAT_SECONDS = 60
+"""The interval of the heartbeats of a running search, which does not save anything for a longer time."""
 
 
 def search_solution(instance):
@@ -42,38 +64,262 @@ def search_solution(instance):
     5.  Then we calculate the meta data (price, time, co2 etc) for each permutation.
 
     6.  Subsequently, we evaluate the single permutations.
+
+    The search is saved in a solution space. Its status and progress are saved with each committed chunk of
+    permutations, so an interrupted search can be continued (see resume_solution_space).
+    If the part is saved within a transaction (e.g. by the admin), the search starts after the transaction is
+    committed, so the chunks are really committed and the search sees the related objects saved with the part.
+    """
+    solution_space = solutions_models.SolutionSpace.objects.create(part=instance)
+    transaction.on_commit(lambda: build_solution_space(solution_space))
+
+
+def resume_solution_space(solution_space: solutions_models.SolutionSpace):
+    """
+    Continue an interrupted search of a solution space.
+    The permutations, which are already committed, are not calculated again.
+
+    :param solution_space: The solution space, which is not done.
+    """
+    if solution_space.status == 'done':
+        logger.warning("The search of solution space '{0}' is already done.".format(str(solution_space)))
+        return
+    build_solution_space(solution_space)
+
+
+def build_solution_space(solution_space: solutions_models.SolutionSpace):
+    """
+    Search the solutions of the part of a solution space (see search_solution).
+    A started search continues after the cursor of the solution space.
+
+    :param solution_space: The solution space to save the calculations.
+    """
+    instance = solution_space.part
+    try:
+        if solution_space.status != 'evaluating':
+            set_status(solution_space, 'matching')
+            diagnostics = [] if getattr(settings, 'MATCHING_DIAGNOSTICS', False) else None
+            manufacturing_possibilities = find_matching_resources(instance, diagnostics=diagnostics)
+            solution_space.diagnostics = diagnostics
+            if not manufacturing_possibilities:
+                # There is no solution.
+                logger.error("Could not find a valid solution for part '{0}'. "
+                             "There is no manufacturing possibility, where each part process step "
+                             "has a possible resource (with according resource skills), which fulfills the constraints."
+                             .format(str(instance.pk)))
+                if diagnostics is None:
+                    # There is nothing to inspect, so the empty solution space is not kept.
+                    solution_space.delete()
+                else:
+                    # Keep the empty solution space, so the diagnostics can be inspected.
+                    set_status(solution_space, 'failed')
+                return
+
+            if solution_space.estimate is None:
+                # Estimate the size of the solution space before creating any permutation,
+                # so a bounded strategy can be chosen for too large solution spaces.
+                # A resumed search keeps its strategy and storage, so its cursor stays valid.
+                solution_space.storage = get_storage()
+                solution_space.estimate = estimate_solution_space(manufacturing_possibilities,
+                                                                  core_models.Consumable.objects.count(),
+                                                                  solution_space.storage)
+                logger.info("The solution space of part '{0}' has {1} permutations (estimated rows: {2}, bytes: {3})."
+                            .format(str(instance.pk), solution_space.estimate['permutations'],
+                                    solution_space.estimate['rows'], solution_space.estimate['bytes']))
+                solution_space.strategy = get_strategy(instance, solution_space.estimate)
+
+            set_status(solution_space, 'costing')
+            if not calculate_costs_of_permutations(instance, manufacturing_possibilities, solution_space):
+                set_status(solution_space, 'failed')
+                return
+
+        set_status(solution_space, 'evaluating')
+        evaluate_solution_space(solution_space)
+        set_status(solution_space, 'done')
+
+    except Exception as e:
+        logger.error("Something unexpected went wrong while trying to search the solution space '{0}' "
+                     "of part '{1}'.".format(str(solution_space), str(instance.pk)), exc_info=True)
+        set_status(solution_space, 'failed')
+
+
+def set_status(solution_space: solutions_models.SolutionSpace, status: str):
+    """
+    Save the solution space with the new status.
+    """
+    solution_space.status = status
+    solution_space.save()
+
+
+class Heartbeat:
+    """
+    Callable, which marks the search of a solution space as running during long calculations, which do not save
+    anything (e.g. the search of a Pareto front). The time of the last change of the solution space is updated
+    at most every HEARTBEAT_SECONDS, so the search is not resumed by another process (see resume_solution_spaces).
     """
-    manufacturing_possibilities = find_matching_resources(instance)
-    if not manufacturing_possibilities:
-        # There is no solution.
-        logger.error("Could not find a valid solution for part '{0}'. "
-                     "There is no manufacturing possibility, where each part process step "
-                     "has a possible resource (with according resource skills), which fulfills the constraints."
-                     .format(str(instance.pk)))
+
+    def __init__(self, solution_space: solutions_models.SolutionSpace):
+        self.solution_space = solution_space
+        self.last_beat = time.monotonic()
+
+    def __call__(self):
+        if time.monotonic() - self.last_beat >= HEARTBEAT_SECONDS:
+            self.last_beat = time.monotonic()
+            solutions_models.SolutionSpace.objects.filter(pk=self.solution_space.pk).update(
+                updated_at=timezone.now())
+
+
+def evaluate_solution_space(solution_space: solutions_models.SolutionSpace):
+    """
+    Call one of the evaluation methods, which rank the permutations.
+
+    :param solution_space: The solution space, which shall be evaluated.
+    """
+    method_number = solution_space.part.evaluation_method
+    if solution_space.storage == 'packed':
+        packed.evaluate(solution_space=solution_space, sorted_fields=get_sorted_fields(solution_space.part))
+    elif method_number == 1 or len(solution_space.permutations.all()) <= 1:
+        if len(solution_space.permutations.all()) <= 1:
+            logger.warning("Could not evaluate the permutations, since there is only one.")
+        field_evaluation(solution_space=solution_space)
+    elif method_number == 2:
+        weighted_field_evaluation(solution_space=solution_space)
+    elif method_number == 3:
+        critic_evaluation(solution_space=solution_space)
     else:
-        solution_space = solutions_models.SolutionSpace.objects.create(part=instance)
-
-        calculate_costs_of_permutations(instance, manufacturing_possibilities, solution_space)
-
-        # Call one of the evaluation methods, which rank the permutations.
-        method_number = solution_space.part.evaluation_method
-        if method_number == 1 or len(solution_space.permutations.all()) <= 1:
-            if len(solution_space.permutations.all()) <= 1:
-                logger.warning("Could not evaluate the permutations, since there is only one.")
-            field_evaluation(solution_space=solution_space)
-        elif method_number == 2:
-            weighted_field_evaluation(solution_space=solution_space)
-        elif method_number == 3:
-            critic_evaluation(solution_space=solution_space)
-        else:
-            logger.error("Given method number '{0}' is not defined.".format(str(method_number)))
+        logger.error("Given method number '{0}' is not defined.".format(str(method_number)))
 
 
-def find_matching_resources(instance) -> dict:
+def estimate_solution_space(manufacturing_possibilities: dict, consumables: int, storage: str) -> dict:
+    """
+    Estimate the size of the solution space from the number of candidates of each part process step.
+    The number of permutations of a manufacturing possibility is the product of the numbers of candidates.
+
+    :param manufacturing_possibilities: Dictionary containing all possible manufacturing possibilities
+    and the according part process steps with the possible resource skills.
+    :param consumables: The number of registered consumables.
+    :param storage: The storage of the permutations.
+    return: Dictionary containing the number of permutations, the number of rows and the bytes,
+    if all permutations are saved. Since only the used consumables are saved, the rows are an upper bound.
+    """
+    permutations = 0
+    rows = 0
+    values = 0
+    """The number of values of the packed arrays."""
+    for process_steps_with_resource_skills in manufacturing_possibilities.values():
+        size = 1
+        for resource_skills in process_steps_with_resource_skills.values():
+            size *= len(resource_skills)
+            # Each solution with its consumable costs (at most one per consumable) is saved once.
+            rows += len(resource_skills) * (1 + 2 * consumables)
+        steps = len(process_steps_with_resource_skills)
+        permutations += size
+        # Each permutation with its overall consumable costs (at most one per consumable) and its relations
+        # to the solutions, the consumables and the solution space.
+        rows += size * (2 + steps + 2 * consumables)
+        values += size * (len(packed.PackedPermutations.ARRAYS) - 1 + steps)
+
+    if storage == 'packed':
+        return {'permutations': permutations, 'rows': 0, 'bytes': values * PACKED_VALUE_BYTES}
+    return {'permutations': permutations, 'rows': rows, 'bytes': rows * ROW_BYTES}
+
+
+def get_strategy(instance, estimate: dict = None) -> str:
+    """
+    Get the strategy for creating the permutations defined in the settings (SOLUTION_SPACE_STRATEGY).
+    If all permutations shall be saved, but the estimated solution space exceeds the limits
+    (SOLUTION_SPACE_MAX_PERMUTATIONS or SOLUTION_SPACE_MAX_BYTES), the bounded strategy is used instead
+    (SOLUTION_SPACE_BOUNDED_STRATEGY).
+
+    :param instance: The part instance.
+    :param estimate: Optional estimate of the solution space (see estimate_solution_space).
+    return: The strategy. If the strategy is not defined or not possible, all permutations are saved ('full').
+    """
+    strategy = getattr(settings, 'SOLUTION_SPACE_STRATEGY', 'full')
+    if strategy not in dict(solutions_models.STRATEGIES):
+        logger.error("Given solution space strategy '{0}' is not defined. Saving all permutations."
+                     .format(str(strategy)))
+        strategy = 'full'
+    if strategy == 'top_k' and instance.evaluation_method not in (1, 2):
+        logger.warning("The best permutations can only be searched for the evaluation methods 1 and 2. "
+                       "Saving all permutations of part '{0}'.".format(str(instance.pk)))
+        strategy = 'full'
+
+    if strategy == 'full' and estimate is not None and (
+            estimate['permutations'] > getattr(settings, 'SOLUTION_SPACE_MAX_PERMUTATIONS', 100000) or
+            estimate['bytes'] > getattr(settings, 'SOLUTION_SPACE_MAX_BYTES', 1024 ** 3)):
+        strategy = getattr(settings, 'SOLUTION_SPACE_BOUNDED_STRATEGY', 'heuristic')
+        if strategy not in BOUNDED_STRATEGIES:
+            logger.error("Given bounded solution space strategy '{0}' is not one of {1}. Using 'heuristic'."
+                         .format(str(strategy), ', '.join(BOUNDED_STRATEGIES)))
+            strategy = 'heuristic'
+        if strategy == 'top_k' and instance.evaluation_method not in (1, 2):
+            # The best permutations can not be searched, so a sample is saved.
+            strategy = 'sampled'
+        logger.warning("The solution space of part '{0}' is too large to save all permutations "
+                       "(estimated permutations: {1}, bytes: {2}). Using the strategy '{3}'."
+                       .format(str(instance.pk), estimate['permutations'], estimate['bytes'], strategy))
+    return strategy
+
+
+def get_storage() -> str:
+    """
+    Get the storage of the permutations defined in the settings (SOLUTION_SPACE_STORAGE).
+
+    return: The storage. If the storage is not defined, the permutations are saved as rows ('rows').
+    """
+    storage = getattr(settings, 'SOLUTION_SPACE_STORAGE', 'rows')
+    if storage not in dict(solutions_models.STORAGES):
+        logger.error("Given solution space storage '{0}' is not defined. Saving the permutations as rows."
+                     .format(str(storage)))
+        return 'rows'
+    return storage
+
+
+def get_writer(solution_space: solutions_models.SolutionSpace):
+    """
+    Get the writer, which saves the permutations in the storage of the solution space.
+
+    return: The writer with the methods write(cost_table, choices, totals) and close().
+    """
+    if solution_space.storage == 'packed':
+        return packed.PackedWriter(solution_space)
+    return persistence.PermutationWriter(solution_space)
+
+
+def get_matcher(capability_index: matching.CapabilityIndex = None):
+    """
+    Get the matcher of the matching engine defined in the settings (MATCHING_ENGINE).
+
+    :param capability_index: Optional, already loaded index of the resource skills per process step.
+    It is loaded, if it is required by the matching engine.
+
+    return: The matcher, which finds the resource skills fulfilling the constraints of a part process step.
+    """
+    engine = getattr(settings, 'MATCHING_ENGINE', 'python')
+    if engine == 'sql':
+        return query_matching.QueryMatcher()
+
+    if capability_index is None:
+        capability_index = matching.CapabilityIndex.load()
+    if engine == 'numpy':
+        return feasibility.FeasibilityMatcher(capability_index)
+    elif engine != 'python':
+        logger.error("Given matching engine '{0}' is not defined. Using the 'python' matching engine."
+                     .format(str(engine)))
+    return matching.IndexMatcher(capability_index)
+
+
+def find_matching_resources(instance,
+                            capability_index: matching.CapabilityIndex = None,
+                            diagnostics: list = None) -> dict:
     """
     Find matching resources for each part process step of every manufacturing possibility.
 
     :param instance: The part instance.
+    :param capability_index: Optional, already loaded index of the resource skills per process step.
+    :param diagnostics: Optional list, which is filled with the diagnostics of each part process step
+    (considered resource skills and rejected resource skills per constraint).
 
     return: Dictionary containing all possible manufacturing possibilities and the according part steps
     with the possible resource skills.
@@ -110,15 +356,25 @@ def find_matching_resources(instance) -> dict:
     """
 
     try:
+        # Get the matcher of the configured matching engine. The python and numpy engines index all
+        # resource skills by the process step they can perform and parse their ability values once.
+        # The index is reused for all part process steps of all manufacturing possibilities.
+        if matching_cache.is_enabled():
+            # The matcher (and its index) is only created, if a part process step is not cached.
+            matcher = matching_cache.CachedMatcher(lambda: get_matcher(capability_index))
+        else:
+            matcher = get_matcher(capability_index)
+
         # Get all through models 'PartProcessStep' of the Part.
-        for part_process_step in instance.PartProcessStep.all():
-            try:
-                resources_temp = []
-                """
-                List temporarily containing the resource skills, 
-                which fulfill all constraints of a part process step.
-                """
+        part_process_steps = list(instance.PartProcessStep.all())
+
+        # Get the resource skills, which can perform the process_step and fulfill all constraints.
+        # The part process steps are matched independently, serially or with a pool of workers (MATCHING_WORKERS).
+        # The results are in the order of the part process steps.
+        results = parallel.match_part_process_steps(matcher, part_process_steps)
 
+        for part_process_step, resources_temp in zip(part_process_steps, results):
+            try:
                 # Add the manufacturing possibility number and part_process_step.
                 if part_process_step.manufacturing_possibility not in manufacturing_possibilities.keys():
                     manufacturing_possibilities[part_process_step.manufacturing_possibility] = {
@@ -127,136 +383,9 @@ def find_matching_resources(instance) -> dict:
                     manufacturing_possibilities[part_process_step.manufacturing_possibility][
                         part_process_step] = []
 
-                # Get all available resources.
-                for resource in core_models.Resource.objects.all():
-                    # Get all through models 'ResourceSkill' of the Resource.
-                    for resource_skill in resource.ResourceSkill.all():
-                        # Check if the resource_skill abilities fulfill the constraints of
-                        # the part_process_step. If so, 'True' is added to this list. Otherwise, 'False'.
-                        constraints_fulfilled = []
-                        """List containing booleans, which indicate if all constraints of a 
-                        part process step were fulfilled. 
-                        If there is a 'False' not all constraints could be fulfilled."""
-                        # Check if process_step of the resource_skill skill matches the process_step of
-                        # the part_process_step.
-                        if resource_skill.skill.process_step == part_process_step.process_step:
-                            # If it is an optional constraint, we skip it.
-                            for constraint in part_process_step.Constraint.all():
-                                # Is there an ability, which fulfills this constraint.
-                                fulfilled = False
-                                for ability in resource_skill.Ability.all():
-                                    # Check if the ability is based on the same requirement as the constraint.
-                                    if ability.requirement == constraint.requirement:
-                                        # Convert the values to the data type defined in the requirement.
-                                        # Conversion is possible, already checked at model level.
-                                        ability_value = TYPES[ability.requirement.data_type](ability.value)
-                                        constraint_value = TYPES[constraint.requirement.data_type](constraint.value)
-                                        # Check if the value of the ability satisfies the value of the constraint
-                                        # in dependence of the defined operator.
-                                        if constraint.operator == "=":
-                                            if ability_value == constraint_value:
-                                                fulfilled = True
-                                                break
-                                        elif constraint.operator == "!=":
-                                            if ability_value != constraint_value:
-                                                fulfilled = True
-                                                break
-                                        elif constraint.operator == "<":
-                                            if ability_value < constraint_value:
-                                                fulfilled = True
-                                                break
-                                        elif constraint.operator == ">":
-                                            if ability_value > constraint_value:
-                                                fulfilled = True
-                                                break
-                                        elif constraint.operator == "<=":
-                                            if ability_value <= constraint_value:
-                                                fulfilled = True
-                                                break
-                                        elif constraint.operator == ">=":
-                                            if ability_value >= constraint_value:
-                                                fulfilled = True
-                                                break
-                                        else:
-                                            # Operator does not exist.
-                                            # This should never happen, since the operators are fixed.
-                                            logger.error("Could not find a matching operator for given operator '{0}' "
-                                                         "of constraint '{1}'."
-                                                         .format(str(constraint.operator), str(constraint)))
-
-                                # Check if there was at least one ability, which fulfills the constraint.
-                                if fulfilled:
-                                    constraints_fulfilled.append(True)
-                                else:
-                                    if not constraint.optional:
-                                        constraints_fulfilled.append(False)
-                                        break
-                                    else:
-                                        # It was an optional constraint. Check if there is another constraint
-                                        # based on the same requirement, which is also optional and
-                                        # which is fulfilled by the resource.
-                                        for other_constraint in part_process_step.Constraint.all().filter(
-                                                requirement__pk=constraint.requirement.id,
-                                                optional=True).exclude(id=constraint.id):
-                                            # Since we have multiple constraints with the same requirement.id,
-                                            # these are double checked, but ok.
-                                            # Now we check, if the other constraints are fulfilled.
-                                            # Is there an ability, which fulfills this constraint.
-                                            for ability in resource_skill.Ability.all():
-                                                # Check if the ability is based on the same requirement as the constraint.
-                                                if ability.requirement == other_constraint.requirement:
-                                                    # Convert the values to the data type defined in the requirement.
-                                                    # Conversion is possible, already checked at model level.
-                                                    ability_value = TYPES[ability.requirement.data_type](ability.value)
-                                                    constraint_value = TYPES[other_constraint.requirement.data_type](
-                                                        other_constraint.value)
-                                                    # Check if the value of the ability satisfies the value
-                                                    # of the constraint in dependence of the defined operator.
-                                                    if other_constraint.operator == "=":
-                                                        if ability_value == constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    elif other_constraint.operator == "!=":
-                                                        if ability_value != constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    elif other_constraint.operator == "<":
-                                                        if ability_value < constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    elif other_constraint.operator == ">":
-                                                        if ability_value > constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    elif other_constraint.operator == "<=":
-                                                        if ability_value <= constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    elif other_constraint.operator == ">=":
-                                                        if ability_value >= constraint_value:
-                                                            fulfilled = True
-                                                            break
-                                                    else:
-                                                        # Operator does not exist.
-                                                        # This should never happen, since the operators are fixed.
-                                                        logger.error(
-                                                            "Could not find a matching operator for "
-                                                            "given operator '{0}' of constraint '{1}'."
-                                                                .format(str(other_constraint.operator),
-                                                                        str(other_constraint)))
-                                            if fulfilled:
-                                                break
-
-                                        # Check if there was at least one ability, which fulfills the constraint.
-                                        if fulfilled:
-                                            constraints_fulfilled.append(True)
-                                        else:
-                                            constraints_fulfilled.append(False)
-                                            break
-
-                            # Save this resource if it does not already exist and the constraints are fulfilled.
-                            if False not in constraints_fulfilled:
-                                resources_temp.append(resource_skill)
+                # The matching of this part process step failed.
+                if isinstance(resources_temp, Exception):
+                    raise resources_temp
 
                 # Add the list with possible resource skills to the possible_resource_skills dictionary.
                 possible_resource_skills[part_process_step] = resources_temp
@@ -269,6 +398,21 @@ def find_matching_resources(instance) -> dict:
                              "of part '{1}'.".format(str(part_process_step), str(instance.pk)),
                              exc_info=True)
 
+            if diagnostics is not None:
+                try:
+                    # Count the considered and rejected resource skills of this part process step.
+                    step_diagnostics = dict(matcher.diagnose(part_process_step))
+                    step_diagnostics.update({
+                        'part_process_step': str(part_process_step.pk),
+                        'process_step': str(part_process_step.process_step),
+                        'manufacturing_possibility': part_process_step.manufacturing_possibility,
+                        'manufacturing_sequence_number': part_process_step.manufacturing_sequence_number,
+                        'matched': len(resources_temp) if isinstance(resources_temp, list) else None})
+                    diagnostics.append(step_diagnostics)
+                except Exception as e:
+                    logger.warning("Could not create the diagnostics of part process step '{0}' of part '{1}'."
+                                   .format(str(part_process_step), str(instance.pk)), exc_info=True)
+
         # logger.debug("Manufacturing possibilities before cleaning: " + str(manufacturing_possibilities))
 
         # Now check if there is a solution.
@@ -297,216 +441,365 @@ def find_matching_resources(instance) -> dict:
 
 def calculate_costs_of_permutations(instance,
                                     manufacturing_possibilities,
-                                    solution_space: solutions_models.SolutionSpace):
+                                    solution_space: solutions_models.SolutionSpace) -> bool:
     """
     Create permutations and calculate the according costs.
+    The permutations are saved chunk by chunk. A resumed search continues after the cursor of the solution space.
 
     :param instance: The part instance.
     :param manufacturing_possibilities: Dictionary containing all possible manufacturing possibilities
     and the according part process steps with the possible resource skills.
     :param solution_space: The solution space to save the calculations.
-    return:
+    return: True, if the permutations are saved.
     """
+    batch_size = getattr(settings, 'PERMUTATION_BATCH_SIZE', 1000)
+    """The number of permutations, which are calculated and saved in one transaction."""
+
     # Calculate the costs (price, time and CO2) and consumables (in dependence which consumable exist)
     # for each single resource skill and subsequently for each solution
     # (unique combination of single resource skills for each manufacturing possibility).
+    try:
+        # Load the consumables of all possible resource skills with one query.
+        consumable_matrix = costing.ConsumableMatrix.load(
+            [resource_skill
+             for process_steps_with_resource_skills in manufacturing_possibilities.values()
+             for resource_skills in process_steps_with_resource_skills.values()
+             for resource_skill in resource_skills],
+            list(core_models.Consumable.objects.all()))
+    except Exception as e:
+        logger.error("Could not load the consumables of the resource skills for part '{0}'."
+                     .format(str(instance.pk)), exc_info=True)
+        return False
 
-    # Now we try to create and calculate the single solutions.
+    cost_tables = []
+    """List containing the cost table of each manufacturing possibility."""
     for manufacturing_possibility, process_steps_with_resource_skills in manufacturing_possibilities.items():
         try:
-            all_resource_skills_per_part_process_step = []
-            """A list containing all lists with resource skills for each part process step 
-            of a manufacturing possibility.
-            Example:
-
-            |------MPS1----|  |-----MPS2----|  |-----MPS3------|
-            [[RS1, RS3, RS4], [RS6, RS7, RS9], [RS8, RS10, RS5]]
-            """
-
-            part_process_steps = []
-            """List of all part_process_steps for this manufacturing possibility."""
-
-            for part_process_step, resource_skills in process_steps_with_resource_skills.items():
-                all_resource_skills_per_part_process_step.append(resource_skills)
-                part_process_steps.append(part_process_step)
-
-            # Calculate all possible permutations. Result is a list of tuples.
-            # Since tuples are ordered, we can find the according part_process_step
-            # on the same place in part_process_steps as the permutation in possible_permutations.
-            possible_permutations = list(itertools.product(*all_resource_skills_per_part_process_step))
-            """List of tuples, which represent the single permutations. 
-            This means every combination of resource skills for each required part_process_step.
-            Example:
-            
-            [(RS1, RS6, RS8), (RS1, RS6, RS10) ...]
-            """
-
-            # Iterate over all possible permutations.
-            for possible_permutation in possible_permutations:
-                i = 0
-                """The current index of the set in the possible_permutations list. 
-                Used for finding the according part_process_step."""
-
-                # Create a new object for this permutation.
-                permutation = solutions_models.Permutation(manufacturing_possibility=manufacturing_possibility)
-                permutation.save()
-
-                # Initial meta data of this permutation, which will be updated below.
-                permutation_price = 0
-                permutation_time = 0
-                permutation_co2 = 0
-
-                # TODO: Add further permutation properties for the later evaluation. E.g.:
-                #       - Number of required resources
-                #       - Distance Part has to travel (Does this make sense?)
-                #       - Consumables
-                #       - ???
-
-                # Create a ConsumableCost object for each existing consumable.
-                # These are the overall consumables of one permutation.
-                overall_consumable = []
-                """List containing all created ConsumableCost objects for this permutation."""
-                for consumable_object in core_models.Consumable.objects.all():
-                    # Create the ConsumableCost object.
-                    consumable = solutions_models.ConsumableCost(consumable=consumable_object,
-                                                                 is_overall=True)
-                    consumable.save()
-
-                    # Add the ConsumableCost object to the permutation.
-                    permutation.consumables.add(consumable)
-
-                    # Add the ConsumableCost object to a list, so we can update the objects,
-                    # when we have calculated the ConsumableCost objects for each resource_skill.
-                    overall_consumable.append(consumable)
-
-                # Iterate over all resource_skills in the permutation.
-                for resource_skill in possible_permutation:
-                    # Calculate the meta data for this resource_skill.
-                    # The costs are the sum of the fixed costs and the variable costs
-                    # multiplied with the required quantity.
-                    resource_skill_price = resource_skill.fixed_price + part_process_steps[
-                        i].required_quantity * resource_skill.variable_price
-                    resource_skill_co2 = resource_skill.fixed_co2 + part_process_steps[
-                        i].required_quantity * resource_skill.variable_co2
-                    resource_skill_time = resource_skill.fixed_time + part_process_steps[
-                        i].required_quantity * resource_skill.variable_time
-
-                    # Add the costs of this resource to the permutation metadata.
-                    permutation_price += resource_skill_price
-                    permutation_time += resource_skill_time
-                    permutation_co2 += resource_skill_co2
-
-                    # Add the consumables for one resource_skill.
-                    resource_skill_consumables = []
-                    """List containing all ConsumableCost objects for one resource_skill."""
-                    # Get all registered consumables.
-                    for consumable_object in core_models.Consumable.objects.all():
-                        # Check if this consumable is defined in the resource_skill.
-                        if consumable_object in resource_skill.consumables.all():
-                            # Initial values.
-                            consumable_quantity = 0
-                            consumable_price = 0
-                            consumable_co2 = 0
-                            # Check how often the consumable object is given in the particular resource skill.
-                            # This is required, because we can have the same consumable multiple times.
-                            for resource_skill_consumable in resource_skill.SkillConsumable.filter(
-                                    consumable=consumable_object):
-                                # If yes, we calculate the meta data for this consumable.
-                                # Variable quantity.
-                                consumable_variable_quantity = resource_skill_consumable.variable_quantity * \
-                                                               part_process_steps[i].required_quantity
-                                # Complete quantity (incl. fixed_quantity).
-                                consumable_quantity += consumable_variable_quantity + \
-                                                       resource_skill_consumable.fixed_quantity
-
-                                # Variable costs.
-                                consumable_price += consumable_variable_quantity * \
-                                                    resource_skill_consumable.price
-                                # Fixed costs.
-                                consumable_price += resource_skill_consumable.fixed_quantity * \
-                                                    resource_skill_consumable.price
-
-                                # Variable co2.
-                                consumable_co2 += consumable_variable_quantity * \
-                                                  resource_skill_consumable.co2
-                                # Fixed co2.
-                                consumable_co2 += resource_skill_consumable.fixed_quantity * \
-                                                  resource_skill_consumable.co2
-                        else:
-                            # Otherwise, we set everything 0.
-                            consumable_quantity = 0
-                            consumable_price = 0
-                            consumable_co2 = 0
-
-                        # Now we create a ConsumableCost object for each available consumable.
-                        consumable = solutions_models.ConsumableCost(
-                            consumable=consumable_object,
-                            is_overall=False,
-                            quantity=consumable_quantity,
-                            price=consumable_price,
-                            co2=consumable_co2)
-                        consumable.save()
-                        # Add the consumable to the consumable list of this resource_skill.
-                        resource_skill_consumables.append(consumable)
-
-                        # Add the calculated meta data of the consumable to the resource sums.
-                        resource_skill_price += consumable_price
-                        resource_skill_co2 += consumable_co2
-
-                        # Add the calculated meta data of the consumable to the overall permutation sums.
-                        permutation_price += consumable_price
-                        permutation_co2 += consumable_co2
-
-                        # Update the overall consumables.
-                        for overall_consumable_object in overall_consumable:
-                            if overall_consumable_object.consumable == consumable_object:
-                                # Calculate the new values.
-                                new_price = overall_consumable_object.price + consumable_price
-                                new_co2 = overall_consumable_object.co2 + consumable_co2
-                                new_quantity = overall_consumable_object.quantity + consumable_quantity
-                                # Update the field values.
-                                overall_consumable_object.quantity = new_quantity
-                                overall_consumable_object.price = new_price
-                                overall_consumable_object.co2 = new_co2
-                                # Save the updated overall consumable.
-                                overall_consumable_object.save()
-
-                    # Create a new solution object (for each resource_skill).
-                    solution = solutions_models.Solution(
-                        part_process_step=part_process_steps[i],
-                        manufacturing_sequence_number=part_process_steps[i].manufacturing_sequence_number,
-                        resource_skill=resource_skill,
-                        quantity=part_process_steps[i].required_quantity,
-                        price=resource_skill_price,
-                        time=resource_skill_time,
-                        co2=resource_skill_co2)
-                    solution.save()
-
-                    # Add all consumables to the many2many field of the solution.
-                    for consumable in resource_skill_consumables:
-                        solution.consumables.add(consumable)
-
-                    # Add the solution object to the permutation.
-                    permutation.solutions.add(solution)
-
-                    # Count further.
-                    i += 1
-
-                # Add the calculated sums to the permutation.
-                permutation.price = permutation_price
-                permutation.time = permutation_time
-                permutation.co2 = permutation_co2
-                # Save the permutation object.
-                permutation.save()
-
-                # Add the created permutation object to the solution_space.
-                solution_space.permutations.add(permutation)
-
+            # Calculate the costs of the possible resource skills of each part process step once.
+            # Every permutation is assembled from these costs.
+            # Example (price):
+            #
+            # |--MPS1: RS1, RS3, RS4--|  |--MPS2: RS6, RS7--|
+            # [[12.5, 8.0, 30.1],        [4.2, 7.7]]
+            cost_tables.append(costing.CostTable.create(manufacturing_possibility,
+                                                        process_steps_with_resource_skills,
+                                                        consumable_matrix))
         except Exception as e:
             logger.error("Something unexpected went wrong while trying to calculate the costs of "
                          "manufacturing possibility '{0}' for part '{1}'."
                          .format(str(manufacturing_possibility), str(instance.pk)), exc_info=True)
 
+    # The writer saves the permutations as rows or packed (SOLUTION_SPACE_STORAGE).
+    writer = get_writer(solution_space)
+
+    if solution_space.strategy == 'pareto':
+        saved = calculate_pareto_front(instance, cost_tables, solution_space, batch_size, writer)
+    elif solution_space.strategy == 'top_k':
+        saved = calculate_best_permutations(instance, cost_tables, solution_space, batch_size, writer)
+    elif solution_space.strategy == 'sampled':
+        saved = calculate_sampled_permutations(instance, cost_tables, solution_space, batch_size, writer)
+    elif solution_space.strategy == 'heuristic':
+        saved = calculate_heuristic_front(instance, cost_tables, solution_space, batch_size, writer)
+    else:
+        try:
+            # Now we try to create and calculate the single solutions.
+            # The permutations are not materialized. They are created chunk by chunk in the order of
+            # itertools.product as arrays of choices (the index of the resource skill of each part process step).
+            # The totals (price, time and co2) of a chunk are calculated with numpy.
+            write_permutations(solution_space,
+                               writer,
+                               lambda start: costing.get_chunks(cost_tables, batch_size, start),
+                               sum(cost_table.size for cost_table in cost_tables))
+            saved = True
+
+        except Exception as e:
+            logger.error("Something unexpected went wrong while trying to calculate the costs of "
+                         "the permutations for part '{0}'.".format(str(instance.pk)), exc_info=True)
+            saved = False
+
+    try:
+        writer.close()
+    except Exception as e:
+        logger.error("Could not save the permutations of part '{0}'.".format(str(instance.pk)), exc_info=True)
+        return False
+    return saved
+
+
+def clamp_count(count: int) -> int:
+    """
+    Limit a number of permutations to the range of the database fields.
+    The exact number of all permutations is kept in the estimate of the solution space.
+    """
+    return min(count, MAX_COUNT)
+
+
+def write_permutations(solution_space: solutions_models.SolutionSpace, writer, get_chunks, total: int):
+    """
+    Write the permutations chunk by chunk. The progress of the solution space is committed with each chunk.
+    If the writer is resumable, the permutations up to the cursor of the solution space are already saved,
+    so they are skipped.
+
+    :param solution_space: The solution space to save the calculations.
+    :param writer: The writer, which saves the permutations.
+    :param get_chunks: Callable, which gets the number of skipped permutations and returns the generator
+    of the chunks (tuples containing the cost table, the choices and the totals) in the same order for every call.
+    :param total: The number of permutations, which are written.
+    """
+    cursor = solution_space.cursor if writer.resumable else None
+    if cursor and cursor['total'] != total:
+        # The resource skills were changed, so the saved permutations do not fit anymore.
+        logger.warning("The solution space '{0}' changed since its search was interrupted. Starting over."
+                       .format(str(solution_space)))
+        persistence.delete_permutations(solution_space)
+        cursor = None
+
+    chunk = cursor['chunk'] if cursor else -1
+    """The index of the last committed chunk."""
+    solution_space.processed_permutations = cursor['permutations'] if cursor else 0
+    solution_space.total_permutations = clamp_count(total)
+    solution_space.cursor = cursor
+    solution_space.save()
+
+    for cost_table, choices, totals in get_chunks(solution_space.processed_permutations):
+        with transaction.atomic():
+            writer.write(cost_table, choices, totals)
+            chunk += 1
+            solution_space.processed_permutations += len(choices)
+            if writer.resumable:
+                solution_space.cursor = {'chunk': chunk,
+                                         'manufacturing_possibility': cost_table.manufacturing_possibility,
+                                         'permutations': solution_space.processed_permutations,
+                                         'total': total}
+            solution_space.save()
+
+
+def calculate_pareto_front(instance,
+                           cost_tables: list,
+                           solution_space: solutions_models.SolutionSpace,
+                           batch_size: int,
+                           writer) -> bool:
+    """
+    Save only the permutations, which are not dominated by another permutation.
+    The number of the other permutations is saved in the solution space.
+    The permutations of the pruned resource skills are enumerated. If there are more than
+    SOLUTION_SPACE_MAX_PERMUTATIONS of them, the approximate Pareto front is searched instead
+    (see calculate_heuristic_front) and the strategy of the solution space is changed to 'heuristic'.
+
+    :param instance: The part instance.
+    :param cost_tables: List containing the cost table of each manufacturing possibility.
+    :param solution_space: The solution space to save the calculations.
+    :param batch_size: The number of permutations, which are calculated and saved at once.
+    :param writer: The writer, which saves the permutations.
+    return: True, if the permutations are saved.
+    """
+    try:
+        # Resource skills, which are dominated within their part process step, can not be part of the front.
+        pruned_cost_tables = [cost_table.get_pruned() for cost_table in cost_tables]
+        pruned_size = sum(pruned_cost_table.size for pruned_cost_table in pruned_cost_tables)
+        if pruned_size > getattr(settings, 'SOLUTION_SPACE_MAX_PERMUTATIONS', 100000):
+            logger.warning("The pruned solution space of part '{0}' is too large to calculate the pareto front "
+                           "({1} permutations). Searching the approximate pareto front instead."
+                           .format(str(instance.pk), pruned_size))
+            solution_space.strategy = 'heuristic'
+            solution_space.save()
+            return calculate_heuristic_front(instance, cost_tables, solution_space, batch_size, writer)
+
+        front = costing.ParetoFront()
+        heartbeat = Heartbeat(solution_space)
+        size = 0
+        """The number of all permutations."""
+        for cost_table, pruned_cost_table in zip(cost_tables, pruned_cost_tables):
+            size += cost_table.size
+            for positions, choices, totals in pruned_cost_table.get_chunks(batch_size):
+                front.add(pruned_cost_table, choices, totals)
+                heartbeat()
+
+        write_permutations(solution_space,
+                           writer,
+                           lambda start: costing.skip_permutations(front.get_chunks(batch_size), start),
+                           len(front))
+
+        solution_space.pruned_permutations = clamp_count(size - len(front))
+        solution_space.bounds = costing.get_bounds(cost_tables)
+        solution_space.save()
+        return True
+
+    except Exception as e:
+        logger.error("Something unexpected went wrong while trying to calculate the pareto front "
+                     "for part '{0}'.".format(str(instance.pk)), exc_info=True)
+        return False
+
+
+def calculate_best_permutations(instance,
+                                cost_tables: list,
+                                solution_space: solutions_models.SolutionSpace,
+                                batch_size: int,
+                                writer) -> bool:
+    """
+    Save only the best permutations (SOLUTION_SPACE_TOP_K) regarding the evaluation method of the part.
+    The permutations are found without calculating all permutations.
+
+    1.  Evaluation method 1: The permutations are ordered by the fields. So the score of a resource skill is
+        the vector of its fields in the order of the importance.
+
+    2.  Evaluation method 2: The comparison value is the weighted sum of the min-max normalized fields.
+        The minimum and maximum of all permutations are the sums of the minimums and maximums of the part process
+        steps. So the comparison value is greatest, if the sum of the weighted fields divided by
+        their ranges is lowest, which is the sum of the scores of the resource skills.
+
+    The number of the other permutations and the bounds of all permutations are saved in the solution space.
+
+    :param instance: The part instance.
+    :param cost_tables: List containing the cost table of each manufacturing possibility.
+    :param solution_space: The solution space to save the calculations.
+    :param batch_size: The number of permutations, which are saved at once.
+    :param writer: The writer, which saves the permutations.
+    return: True, if the permutations are saved.
+    """
+    try:
+        k = getattr(settings, 'SOLUTION_SPACE_TOP_K', 20)
+        bounds = costing.get_bounds(cost_tables)
+
+        if instance.evaluation_method == 2:
+            weights = {'price': instance.price_importance,
+                       'time': instance.time_importance,
+                       'co2': instance.co2_importance}
+
+            def get_scores(cost_table, step):
+                scores = np.zeros(cost_table.shape[step], dtype=float)
+                for field, (min_value, max_value) in bounds.items():
+                    # If min == max, then this criteria has no influence on the overall decision.
+                    if min_value != max_value:
+                        scores += weights[field] * cost_table.costs[field][step] / (max_value - min_value)
+                return scores
+        else:
+            sorted_fields = get_sorted_fields(instance)
+
+            def get_scores(cost_table, step):
+                return np.column_stack([cost_table.costs[field][step] for field in sorted_fields])
+
+        best = costing.get_best(cost_tables, get_scores, k)
+        write_permutations(solution_space,
+                           writer,
+                           lambda start: costing.skip_permutations(best.get_chunks(batch_size), start),
+                           len(best))
+
+        solution_space.pruned_permutations = clamp_count(sum(cost_table.size for cost_table in cost_tables) -
+                                                         len(best))
+        solution_space.bounds = bounds
+        solution_space.save()
+        return True
+
+    except Exception as e:
+        logger.error("Something unexpected went wrong while trying to find the best permutations "
+                     "for part '{0}'.".format(str(instance.pk)), exc_info=True)
+        return False
+
+
+def calculate_sampled_permutations(instance,
+                                   cost_tables: list,
+                                   solution_space: solutions_models.SolutionSpace,
+                                   batch_size: int,
+                                   writer) -> bool:
+    """
+    Save only a uniform random sample of the permutations (SOLUTION_SPACE_SAMPLE_SIZE).
+    The sample is the same for the same seed (SOLUTION_SPACE_SEED).
+    The number of the other permutations and the bounds of all permutations are saved in the solution space.
+
+    :param instance: The part instance.
+    :param cost_tables: List containing the cost table of each manufacturing possibility.
+    :param solution_space: The solution space to save the calculations.
+    :param batch_size: The number of permutations, which are saved at once.
+    :param writer: The writer, which saves the permutations.
+    return: True, if the permutations are saved.
+    """
+    try:
+        sample_size = getattr(settings, 'SOLUTION_SPACE_SAMPLE_SIZE', 10000)
+        size = sum(cost_table.size for cost_table in cost_tables)
+        """The number of all permutations."""
+        if size <= sample_size:
+            # The sample would contain all permutations.
+            sample = [(cost_table, choices) for cost_table in cost_tables
+                      for positions, choices, totals in cost_table.get_chunks(batch_size)]
+        else:
+            sample = list(costing.get_sample(cost_tables, sample_size, getattr(settings, 'SOLUTION_SPACE_SEED', 0)))
+
+        sampled = sum(len(choices) for cost_table, choices in sample)
+        write_permutations(solution_space,
+                           writer,
+                           lambda start: costing.skip_permutations(costing.get_choice_chunks(sample, batch_size),
+                                                                   start),
+                           sampled)
+
+        solution_space.pruned_permutations = clamp_count(size - sampled)
+        solution_space.bounds = costing.get_bounds(cost_tables)
+        solution_space.save()
+        return True
+
+    except Exception as e:
+        logger.error("Something unexpected went wrong while trying to sample the permutations "
+                     "for part '{0}'.".format(str(instance.pk)), exc_info=True)
+        return False
+
+
+def calculate_heuristic_front(instance,
+                              cost_tables: list,
+                              solution_space: solutions_models.SolutionSpace,
+                              batch_size: int,
+                              writer) -> bool:
+    """
+    Save only the approximate Pareto front of the permutations, which is searched with an evolutionary algorithm
+    (see heuristic.search) within a budget of evaluated permutations (SOLUTION_SPACE_HEURISTIC_BUDGET).
+    The search is the same for the same seed (SOLUTION_SPACE_SEED).
+    The number of the other permutations and the bounds of all permutations are saved in the solution space.
+
+    :param instance: The part instance.
+    :param cost_tables: List containing the cost table of each manufacturing possibility.
+    :param solution_space: The solution space to save the calculations.
+    :param batch_size: The number of permutations, which are saved at once.
+    :param writer: The writer, which saves the permutations.
+    return: True, if the permutations are saved.
+    """
+    try:
+        front = heuristic.search(cost_tables,
+                                 getattr(settings, 'SOLUTION_SPACE_HEURISTIC_BUDGET', 100000),
+                                 getattr(settings, 'SOLUTION_SPACE_HEURISTIC_POPULATION', 100),
+                                 getattr(settings, 'SOLUTION_SPACE_SEED', 0),
+                                 Heartbeat(solution_space))
+        size = sum(len(choices) for cost_table, choices in front)
+        """The number of permutations of the front."""
+        write_permutations(solution_space,
+                           writer,
+                           lambda start: costing.skip_permutations(costing.get_choice_chunks(front, batch_size),
+                                                                   start),
+                           size)
+
+        solution_space.pruned_permutations = clamp_count(sum(cost_table.size for cost_table in cost_tables) - size)
+        solution_space.bounds = costing.get_bounds(cost_tables)
+        solution_space.save()
+        return True
+
+    except Exception as e:
+        logger.error("Something unexpected went wrong while trying to search the approximate pareto front "
+                     "for part '{0}'.".format(str(instance.pk)), exc_info=True)
+        return False
+
+
+def get_sorted_fields(instance) -> list:
+    """
+    Sort the fields used for ordering the permutations by their importance.
+
+    :param instance: The part instance.
+    return: List of the fields. The field with the highest importance is the first one.
+    """
+    fields = ['price', 'time', 'co2']
+    importance = [instance.price_importance,
+                  instance.time_importance,
+                  instance.co2_importance]
+    return [val for _, val in sorted(zip(importance, fields),
+                                     key=operator.itemgetter(0),
+                                     reverse=True)]
+
 
 def field_evaluation(solution_space: solutions_models.SolutionSpace):
     """
@@ -517,24 +810,19 @@ def field_evaluation(solution_space: solutions_models.SolutionSpace):
     """
     try:
         # The fields used for ordering.
-        fields = ['price', 'time', 'co2']
-        importance = [solution_space.part.price_importance,
-                      solution_space.part.time_importance,
-                      solution_space.part.co2_importance]
-        sorted_fields = [val for _, val in sorted(zip(importance, fields),
-                                                  key=operator.itemgetter(0),
-                                                  reverse=True)]
-
-        # Order the permutations of the solution_space with the given fields.
-        permutations = solution_space.permutations.all().order_by(*sorted_fields)
-
-        i = 1
-        """The rank number."""
-        for permutation in permutations:
-            # Write the ranks in dependence of the permutations queryset.
-            permutation.rank = i
-            permutation.save()
-            i += 1
+        sorted_fields = get_sorted_fields(solution_space.part)
+
+        # Load the fields of all permutations once and order them. The first field is the most important one.
+        pks, values = critic.get_values(solution_space)
+        order = np.lexsort([values[:, critic.CRITERIA.index(field)] for field in reversed(sorted_fields)])
+
+        # Write the ranks in dependence of the order.
+        ranks = np.zeros(len(pks), dtype=np.int64)
+        ranks[order] = np.arange(1, len(pks) + 1)
+        solutions_models.Permutation.objects.bulk_update(
+            [solutions_models.Permutation(pk=pk, rank=int(rank)) for pk, rank in zip(pks, ranks)],
+            ['rank'],
+            batch_size=1000)
 
     except Exception as e:
         logger.error("Could not do execute the field evaluation for solution_space '{0}'."
@@ -550,39 +838,22 @@ def weighted_field_evaluation(solution_space: solutions_models.SolutionSpace):
     """
     try:
         # Get the weights defined by the user.
-        price_weight = solution_space.part.price_importance,
-        time_weight = solution_space.part.time_importance,
-        co2_weight = solution_space.part.co2_importance
-
-        rank_values = []
-        """The comparison value of each permutation. The greater, the better."""
-        for permutation in solution_space.permutations.all():
-            # Calculate the normalized value using the min-max normalization and weight it for each permutation.
-            # 1 is "best" and 0 is "worst".
-            price_norm = critic.normalize(solution_space=solution_space,
-                                          permutation=permutation,
-                                          attribute='price',
-                                          max_best=False)
-            price_weighted = price_norm * price_weight
-
-            time_norm = critic.normalize(solution_space=solution_space,
-                                         permutation=permutation,
-                                         attribute='time',
-                                         max_best=False)
-            time_weighted = time_norm * time_weight
-
-            co2_norm = critic.normalize(solution_space=solution_space,
-                                        permutation=permutation,
-                                        attribute='co2',
-                                        max_best=False)
-            co2_weighted = co2_norm * co2_weight
-
-            # Calculate the comparison value for each permutation.
-            comparison_value = sum([price_weighted, time_weighted, co2_weighted])
-            rank_values.append(comparison_value)
+        weights = np.array([solution_space.part.price_importance,
+                            solution_space.part.time_importance,
+                            solution_space.part.co2_importance], dtype=float)
+
+        # Calculate the normalized values of all permutations using the min-max normalization at once.
+        # 1 is "best" and 0 is "worst".
+        pks, values = critic.get_values(solution_space)
+        normalized_values = critic.normalize_values(values,
+                                                    bounds=critic.get_bounds(solution_space),
+                                                    max_best=False)
+
+        # Calculate the comparison value (the weighted sum) of each permutation. The greater, the better.
+        rank_values = normalized_values @ weights
 
         # Rank the permutations in accordance to the rank_values.
-        critic.rank(solution_space=solution_space, rank_values=rank_values)
+        critic.save_ranks(solution_space=solution_space, pks=pks, rank_values=rank_values)
 
     except Exception as e:
         logger.error("Could not do execute the weighted field evaluation for solution_space '{0}'."
@@ -601,82 +872,22 @@ def critic_evaluation(solution_space: solutions_models.SolutionSpace):
     :param solution_space: The solution space, which shall be evaluated.
     """
     try:
-        x_price = []
-        """List containing all (for each permutation) normalized values of the criterion price."""
-        x_time = []
-        """List containing all (for each permutation) normalized values of the criterion time."""
-        x_co2 = []
-        """List containing all (for each permutation) normalized values of the criterion co2."""
-
-        # Get all permutations of this solution space.
-        for permutation in solution_space.permutations.all():
-            price_norm = critic.normalize(solution_space=solution_space,
-                                          permutation=permutation,
-                                          attribute='price',
-                                          max_best=False)
-            x_price.append(price_norm)
-
-            time_norm = critic.normalize(solution_space=solution_space,
-                                         permutation=permutation,
-                                         attribute='time',
-                                         max_best=False)
-            x_time.append(time_norm)
-
-            co2_norm = critic.normalize(solution_space=solution_space,
-                                        permutation=permutation,
-                                        attribute='co2',
-                                        max_best=False)
-            x_co2.append(co2_norm)
-
-        # Calculate the standard deviation of the normalized criteria values.
-        # Other index of the divergence in scores (like entropy or variance)
-        # could be used instead of the standard deviation.
-        stdev_price = stdev(x_price)
-        stdev_time = stdev(x_time)
-        stdev_co2 = stdev(x_co2)
-
-        # Calculate the correlation coefficient.
-        # It should be noticed that the Spearman rank correlation coefficient could be used instead of
-        # pearson correlation coefficient in order to provide a more general measure
-        # of the relationship connecting the rank orders of the elements included in the vectors x_j and x_k.
-        array = np.array([x_price, x_time, x_co2])
-        r_matrix = np.corrcoef(array)
-        """
-        Correlation matrix.
-        
-                    price       time        co2
-        price    [[1.         0.29361961 0.99733866]
-        time      [0.29361961 1.         0.22314368]
-        co2       [0.99733866 0.22314368 1.        ]]
-        """
-
-        # Remove the diagonal from the correlation matrix.
-        c_matrix = r_matrix[~np.eye(r_matrix.shape[0], dtype=bool)].reshape(r_matrix.shape[0], -1)
-
-        # Calculate the amount of information c.
-        c_price = stdev_price * sum([(1 - c_matrix[0][0]), (1 - c_matrix[0][1])])
-        c_time = stdev_time * sum([(1 - c_matrix[1][0]), (1 - c_matrix[1][1])])
-        c_co2 = stdev_co2 * sum([(1 - c_matrix[2][0]), (1 - c_matrix[2][1])])
-
-        # Calculate the weights w.
-        w_price = c_price / (sum([c_price, c_time, c_co2]))
-        w_time = c_time / (sum([c_price, c_time, c_co2]))
-        w_co2 = c_co2 / (sum([c_price, c_time, c_co2]))
-
-        rank_values = []
-        # Calculate the multi criteria score d.
-        for i in range(len(solution_space.permutations.all())):
-            d_price = sum([(w_price * x_price[i])])
-            d_time = sum([(w_time * x_time[i])])
-            d_co2 = sum([(w_co2 * x_co2[i])])
-
-            d_all = sum([d_price, d_time, d_co2])
-
-            # Add the comparison_value to the list.
-            rank_values.append(d_all)
+        # Calculate the normalized values of all permutations (one row per permutation and one column
+        # for price, time and co2) at once.
+        pks, values = critic.get_values(solution_space)
+        normalized_values = critic.normalize_values(values,
+                                                    bounds=critic.get_bounds(solution_space),
+                                                    max_best=False)
+
+        # Calculate the weights from the standard deviation of the normalized criteria values and
+        # their correlation coefficients (the amount of information of each criterion).
+        weights = critic.get_weights(normalized_values)
+
+        # Calculate the multi criteria score d of each permutation.
+        rank_values = normalized_values @ weights
 
         # Rank the permutations in accordance to the rank_values.
-        critic.rank(solution_space=solution_space, rank_values=rank_values)
+        critic.save_ranks(solution_space=solution_space, pks=pks, rank_values=rank_values)
 
     except Exception as e:
         logger.error("Could not do execute the CRITIC evaluation for solution_space '{0}'."
@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from core import models as core_models
+from solutions import models as solutions_models
+from solutions import search_solution
+
+
+class ParetoFrontTestCase(TestCase):
+
+    def setUp(self):
+        unit = core_models.Unit.objects.create(name='mm')
+        process_step = core_models.ProcessStep.objects.create(manufacturing_process='Milling', unit=unit)
+        skill = core_models.Skill.objects.create(name='Milling', process_step=process_step)
+        # The resource skills trade price for time, so none of them is dominated and pruning removes nothing.
+        for i in range(10):
+            resource = core_models.Resource.objects.create(name='Resource {0}'.format(i), postal_code=70174,
+                                                           street='Seidenstraße', city='Stuttgart', country='DE')
+            core_models.ResourceSkill.objects.create(skill=skill, resource=resource,
+                                                     fixed_price=i, variable_price=0,
+                                                     fixed_time=9 - i, variable_time=0,
+                                                     fixed_co2=1, variable_co2=0)
+        self.part = core_models.Part.objects.create(name='Part', evaluation_method=1)
+        # 10 candidates for each of 20 part process steps: 10^20 permutations exceed the range of int64.
+        for sequence_number in range(1, 21):
+            core_models.PartProcessStep.objects.create(part=self.part, process_step=process_step,
+                                                       required_quantity=1, manufacturing_possibility=1,
+                                                       manufacturing_sequence_number=sequence_number)
+
+    @override_settings(SOLUTION_SPACE_STRATEGY='pareto', SOLUTION_SPACE_STORAGE='rows',
+                       SOLUTION_SPACE_HEURISTIC_BUDGET=2000, SOLUTION_SPACE_HEURISTIC_POPULATION=50)
+    def test_too_large_pruned_solution_space(self):
+        """
+        The pareto front of a pruned solution space, which is too large to enumerate,
+        is searched with the heuristic instead of raising.
+        """
+        solution_space = solutions_models.SolutionSpace.objects.create(part=self.part)
+        search_solution.build_solution_space(solution_space)
+
+        solution_space.refresh_from_db()
+        self.assertEqual(solution_space.status, 'done')
+        self.assertEqual(solution_space.strategy, 'heuristic')
+        self.assertEqual(solution_space.estimate['permutations'], 10 ** 20)
+        self.assertGreater(solution_space.permutations.count(), 0)
+        self.assertEqual(solution_space.pruned_permutations, search_solution.MAX_COUNT)